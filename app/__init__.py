@@ -1,5 +1,8 @@
+import os
+
 from flask import Flask
 from flask_login import LoginManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Инициализация Flask-Login
 login_manager = LoginManager()
@@ -11,6 +14,75 @@ def create_app():
     # Конфигурация
     app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
     app.config['ITEMS_PER_PAGE'] = 9
+    app.config['COMPRESS_MIN_SIZE'] = 500        # байт; меньшие ответы не сжимаются
+    app.config['COMPRESS_LEVEL'] = 6
+    app.config['STATIC_MAX_AGE'] = 3600          # файлы без хеша в имени
+    app.config['STATIC_HASHED_MAX_AGE'] = 31536000
+    
+    # Фоновое обслуживание SQLite (интервалы задач в секундах)
+    app.config['MAINTENANCE_ENABLED'] = True
+    app.config['MAINTENANCE_TICK'] = 30
+    app.config['MAINTENANCE_JOBS'] = {
+        'wal_checkpoint': 60,
+        'incremental_vacuum': 600,
+        'optimize': 3600,
+        'analyze': 86400,
+        'overdue_scan': 60,
+    }
+    app.config['MAINTENANCE_TIME_BUDGET'] = 1.0  # секунд на один запуск vacuum
+    app.config['MAINTENANCE_VACUUM_STEP'] = 64   # страниц за шаг
+    
+    # Ограничение частоты запросов: rate - токенов в секунду, burst - емкость
+    # корзины, by - ключ корзины (user - пользователь или IP, ip - только IP)
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_STORAGE'] = 'memory'  # 'shared' - общая для воркеров gunicorn
+    app.config['RATELIMIT_SHARED_SLOTS'] = 65536
+    app.config['RATELIMIT_GROUPS'] = {
+        'login': {'paths': ['/login', '/register'], 'methods': ['POST'],
+                  'rate': 0.1, 'burst': 10, 'by': 'ip'},
+        'api': {'paths': ['/api/'], 'rate': 20, 'burst': 40, 'by': 'user'},
+    }
+    # Число прокси перед приложением, чьим заголовкам X-Forwarded-For /
+    # X-Forwarded-Proto можно доверять. За прокси без этого remote_addr у всех
+    # запросов - адрес прокси, и лимиты по IP становятся общими на весь сайт
+    app.config['PROXY_FIX_X_FOR'] = 0
+    app.config['PROXY_FIX_X_PROTO'] = 0
+    # Запросы отклоняются с 503, если в процессе столько операций ждут базу
+    # (в ASGI - очередь к пулу соединений) или самая старая операция с базой
+    # выполняется дольше SHED_DB_WAIT секунд; 0 отключает проверку
+    app.config['SHED_DB_QUEUE_DEPTH'] = 32
+    app.config['SHED_DB_WAIT'] = 1.0
+    
+    # Хеширование паролей: pbkdf2_sha256 или scrypt, вычисляется в пуле потоков
+    app.config['PASSWORD_ALGORITHM'] = 'pbkdf2_sha256'
+    app.config['PASSWORD_PBKDF2_ITERATIONS'] = 600000
+    app.config['PASSWORD_SCRYPT_N'] = 2 ** 14
+    app.config['PASSWORD_SCRYPT_R'] = 8
+    app.config['PASSWORD_SCRYPT_P'] = 1
+    app.config['PASSWORD_HASH_WORKERS'] = 2   # одновременных вычислений на процесс
+    app.config['PASSWORD_HASH_QUEUE'] = 16    # ожидающих сверх этого - отказ
+    
+    # Long polling и асинхронный API (asgi.py)
+    app.config['API_LONG_POLL_MAX'] = 30       # секунд ожидания изменений
+    app.config['API_POLL_INTERVAL'] = 1.0      # период проверки базы
+    app.config['ASYNC_DB_CONNECTIONS'] = 8     # потоков/соединений с базой в ASGI
+    
+    # Календарь задач по сроку выполнения
+    app.config['CALENDAR_DEFAULT_DAYS'] = 7    # интервал без параметра to
+    app.config['CALENDAR_MAX_DAYS'] = 366      # максимальный интервал from..to
+    
+    # Шаблоны: кеш байткода на диске ('' - отключить), кеш карточек задач
+    # в памяти (записей на процесс, 0 - отключить), заголовок Server-Timing
+    app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = os.path.join(app.instance_path, 'jinja_cache')
+    app.config['TEMPLATE_FRAGMENT_CACHE_SIZE'] = 2000
+    app.config['TEMPLATE_TIMING'] = True
+    
+    # Переопределение из окружения: FLASK_SECRET_KEY, FLASK_RATELIMIT_ENABLED=false и т.д.
+    app.config.from_prefixed_env()
+    
+    if app.config['PROXY_FIX_X_FOR'] or app.config['PROXY_FIX_X_PROTO']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'],
+                                x_proto=app.config['PROXY_FIX_X_PROTO'])
     
     # Инициализация Flask-Login
     login_manager.init_app(app)
@@ -22,6 +94,24 @@ def create_app():
     from .database import db
     # База данных инициализируется автоматически при импорте
     
+    from .passwords import init_passwords
+    init_passwords(app)
+    
+    # Статические файлы и сжатие ответов
+    from .assets import init_assets
+    from .compression import init_compression
+    init_assets(app)
+    init_compression(app)
+    
+    from .templating import init_templating
+    init_templating(app)
+    
+    from .maintenance import init_maintenance
+    init_maintenance(app)
+    
+    from .ratelimit import init_ratelimit
+    init_ratelimit(app)
+    
     # Инициализация маршрутов
     from .routes import init_routes
     init_routes(app)
@@ -0,0 +1,142 @@
+"""Эндпоинты /api/* без привязки к серверу.
+
+Функции проверяют параметры, выполняют запросы к базе и возвращают
+(статус, тело ответа). Их вызывают представления Flask (routes.py) и
+асинхронное приложение (asgi.py, в пуле соединений). args - отображение
+параметров строки запроса с методом get, user - текущий пользователь.
+"""
+from functools import wraps
+
+from .models import Task
+
+
+class APIError(Exception):
+    """Ответ с ошибкой: статус и текст для {'error': ...}"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def endpoint(func):
+    """APIError внутри эндпоинта превращается в (статус, {'error': ...})"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except APIError as e:
+            return e.status, {'error': e.message}
+    return wrapper
+
+
+def _fields(args):
+    try:
+        return Task.parse_fields(args.get('fields'))
+    except ValueError as e:
+        raise APIError(400, f'Неизвестные поля: {e}')
+
+
+def _owner_filter(user):
+    """Администратор видит все задачи, остальные - только свои"""
+    return None if user.is_admin else user.id
+
+
+def _check_access(user, task_user_id):
+    if not user.is_admin and task_user_id != user.id:
+        raise APIError(403, 'Доступ запрещен')
+
+
+def _get_task(user, task_id):
+    task = Task.get(task_id)
+    if not task:
+        raise APIError(404, 'Задача не найдена')
+    _check_access(user, task.user_id)
+    return task
+
+
+@endpoint
+def list_tasks(user, args):
+    return 200, Task.get_rows(
+        _fields(args),
+        user_id=_owner_filter(user),
+        status=args.get('status'),
+        priority=args.get('priority'),
+        limit=100
+    )
+
+
+def parse_changes(args, config):
+    """Параметры long polling: (fields, since, timeout) или APIError.
+
+    Ожидание между запросами changes_page выполняет вызывающий: поток
+    в routes.py, цикл событий в asgi.py.
+    """
+    fields = _fields(args)
+    try:
+        timeout = Task.parse_poll_timeout(args.get('timeout'), config['API_LONG_POLL_MAX'])
+        since = Task.parse_cursor(args.get('since'))
+    except ValueError as e:
+        raise APIError(400, str(e))
+    return fields, since, timeout
+
+
+def changes_page(user, fields, since):
+    return Task.get_changed_rows(fields, since=since, user_id=_owner_filter(user))
+
+
+def changes_ready(changes, since):
+    """True, если ответ отдается без ожидания: есть изменения или нет курсора"""
+    return bool(changes['tasks']) or since is None
+
+
+@endpoint
+def task_calendar(user, args, config):
+    fields = _fields(args)
+    try:
+        date_from, date_to = Task.parse_due_range(
+            args.get('from'), args.get('to'),
+            default_days=config['CALENDAR_DEFAULT_DAYS'],
+            max_days=config['CALENDAR_MAX_DAYS']
+        )
+    except ValueError as e:
+        raise APIError(400, str(e))
+
+    tasks = Task.get_due_rows(fields, date_from, date_to, user_id=_owner_filter(user))
+    tasks['from'] = date_from.strftime('%Y-%m-%d')
+    tasks['to'] = date_to.strftime('%Y-%m-%d')
+    return 200, tasks
+
+
+@endpoint
+def tasks_overdue(user, args):
+    return 200, Task.get_overdue_rows(_fields(args), user_id=_owner_filter(user))
+
+
+@endpoint
+def get_task(user, task_id, args):
+    fields = _fields(args)
+    # user_id нужен для проверки прав, даже если клиент его не запросил
+    query_fields = fields if 'user_id' in fields else fields + ['user_id']
+    row = Task.get_row(task_id, query_fields)
+    if not row:
+        raise APIError(404, 'Задача не найдена')
+    _check_access(user, row['user_id'])
+    return 200, {'task': {f: row[f] for f in fields}}
+
+
+@endpoint
+def update_task(user, task_id, data):
+    task = _get_task(user, task_id)
+    try:
+        update_data = Task.parse_api_update(data)
+    except ValueError as e:
+        raise APIError(400, str(e))
+    task.update(**update_data)
+    return 200, {'message': 'Задача обновлена', 'task': task.to_dict()}
+
+
+@endpoint
+def delete_task(user, task_id):
+    _get_task(user, task_id).delete()
+    return 200, {'message': 'Задача удалена'}
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from . import api
+from .auth import User
+from .ratelimit import db_overloaded
+
+
+class AsyncAPI:
+    """Асинхронный вариант эндпоинтов /api/* для ASGI-сервера (uvicorn).
+
+    Использует те же модели Task/User и ту же сессию Flask-Login, что и
+    синхронное приложение: cookie сессии проверяется секретным ключом
+    Flask-приложения. Обращения к базе выполняются в отдельном пуле из
+    ASYNC_DB_CONNECTIONS потоков - каждый держит одно соединение SQLite,
+    так что число соединений ограничено независимо от числа клиентов.
+    Ожидающие запросы (long polling) потоков не занимают.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config['ASYNC_DB_CONNECTIONS'],
+            thread_name_prefix='async-db'
+        )
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.limiter = flask_app.extensions.get('ratelimit')
+        # Вызовы, отправленные в пул и еще не завершенные (очередь + выполнение)
+        self.pending = 0
+        self.routes = [
+            (re.compile(r'^/api/tasks$'), ('GET',), self.list_tasks),
+            (re.compile(r'^/api/tasks/changes$'), ('GET',), self.task_changes),
+            (re.compile(r'^/api/tasks/calendar$'), ('GET',), self.task_calendar),
+            (re.compile(r'^/api/tasks/overdue$'), ('GET',), self.tasks_overdue),
+            (re.compile(r'^/api/task/(\d+)$'), ('GET', 'PUT', 'DELETE'), self.task),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        request = Request(scope, receive)
+        try:
+            status, body, headers = await self.dispatch(request)
+        except Exception:
+            self.flask_app.logger.exception('Ошибка асинхронного API')
+            status, body, headers = 500, {'error': 'Внутренняя ошибка сервера'}, []
+
+        payload = self.flask_app.json.dumps(body).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(payload)).encode())] + headers,
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                maintenance = self.flask_app.extensions.get('maintenance')
+                if maintenance and self.config['MAINTENANCE_ENABLED']:
+                    maintenance.ensure_started()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def db(self, func, *args, **kwargs):
+        """Выполнение блокирующего вызова модели в пуле соединений"""
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    async def dispatch(self, request):
+        for pattern, methods, handler in self.routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            if request.method not in methods:
+                return 405, {'error': 'Метод не поддерживается'}, []
+
+            # Сброс нагрузки до первого обращения к базе (см. ratelimit.py)
+            if db_overloaded(self.config, self.pending):
+                return 503, {'error': 'Сервер перегружен, повторите позже'}, [(b'retry-after', b'1')]
+
+            user = await self.load_user(request)
+            if user is None:
+                return 401, {'error': 'Требуется вход'}, []
+
+            retry_after = self.check_rate_limit(request, user)
+            if retry_after is not None:
+                return 429, {'error': 'Слишком много запросов'}, [
+                    (b'retry-after', str(max(1, math.ceil(retry_after))).encode())
+                ]
+
+            status, body = await handler(request, user, *match.groups())
+            return status, body, []
+        return 404, {'error': 'Не найдено'}, []
+
+    async def load_user(self, request):
+        """Пользователь из cookie сессии Flask-Login"""
+        cookie = request.cookies.get(self.config['SESSION_COOKIE_NAME'])
+        if not cookie or self.serializer is None:
+            return None
+        try:
+            session = self.serializer.loads(
+                cookie, max_age=int(self.config['PERMANENT_SESSION_LIFETIME'].total_seconds())
+            )
+        except Exception:
+            return None
+
+        user_id = session.get('_user_id')
+        if user_id is None:
+            return None
+        user = await self.db(User.get, user_id)
+        return user if user and user.is_active else None
+
+    def check_rate_limit(self, request, user):
+        if not self.limiter or not self.config['RATELIMIT_ENABLED']:
+            return None
+        name, group = self.limiter.match(request.path, request.method)
+        if group is None:
+            return None
+        allowed, retry_after = self.limiter.store.hit(f'{name}:u:{user.id}', group['rate'], group['burst'])
+        return None if allowed else retry_after
+
+    # Эндпоинты (логика общая с routes.py, см. api.py)
+
+    async def list_tasks(self, request, user):
+        return await self.db(api.list_tasks, user, request.args)
+
+    async def task_changes(self, request, user):
+        try:
+            fields, since, timeout = api.parse_changes(request.args, self.config)
+        except api.APIError as e:
+            return e.status, {'error': e.message}
+
+        # Между проверками ожидание идет в цикле событий, поток не занят
+        deadline = time.monotonic() + timeout
+        while True:
+            changes = await self.db(api.changes_page, user, fields, since)
+            if api.changes_ready(changes, since) or time.monotonic() >= deadline:
+                return 200, changes
+            await asyncio.sleep(max(min(self.config['API_POLL_INTERVAL'], deadline - time.monotonic()), 0))
+
+    async def task_calendar(self, request, user):
+        return await self.db(api.task_calendar, user, request.args, self.config)
+
+    async def tasks_overdue(self, request, user):
+        return await self.db(api.tasks_overdue, user, request.args)
+
+    async def task(self, request, user, task_id):
+        if request.method == 'GET':
+            return await self.db(api.get_task, user, int(task_id), request.args)
+        if request.method == 'PUT':
+            return await self.db(api.update_task, user, int(task_id), await request.json())
+        return await self.db(api.delete_task, user, int(task_id))
+
+
+class Request:
+    """Минимальная обертка над ASGI scope"""
+
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self.receive = receive
+        self.method = scope['method']
+        self.path = scope['path']
+        # Первое значение каждого параметра, как request.args.get во Flask
+        self.args = {name: values[0] for name, values
+                     in parse_qs(scope.get('query_string', b'').decode()).items()}
+
+        cookie = SimpleCookie()
+        for name, value in scope.get('headers', []):
+            if name == b'cookie':
+                cookie.load(value.decode('latin-1'))
+        self.cookies = {key: morsel.value for key, morsel in cookie.items()}
+
+    async def json(self):
+        body = b''
+        while True:
+            message = await self.receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        try:
+            return json.loads(body or b'null')
+        except ValueError:
+            return None
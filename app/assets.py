@@ -0,0 +1,126 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from flask import abort, send_from_directory
+
+from .compression import available_encodings, compress, negotiate_encoding, COMPRESSIBLE_MIMETYPES
+
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+class AssetManifest:
+    """Соответствие исходных имен статических файлов именам с хешем
+    и список доступных предсжатых вариантов"""
+    
+    def __init__(self, static_folder, min_size=500, level=9):
+        self.static_folder = static_folder
+        self.min_size = min_size
+        self.level = level
+        self.hashed = {}     # 'css/app.css' -> 'css/app.0123456789ab.css'
+        self.originals = {}  # обратное соответствие
+        self.encodings = {}  # 'css/app.css' -> ['br', 'gzip']
+    
+    def build(self):
+        """Обход каталога static: хеши содержимого и предсжатые варианты"""
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith(tuple(SUFFIXES.values())):
+                    continue
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                
+                with open(path, 'rb') as f:
+                    data = f.read()
+                
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                stem, ext = os.path.splitext(filename)
+                hashed = f'{stem}.{digest}{ext}'
+                self.hashed[filename] = hashed
+                self.originals[hashed] = filename
+                self.encodings[filename] = self._precompress(path, data)
+        return self
+    
+    def _precompress(self, path, data):
+        """Создание файлов .br/.gz рядом с исходным (если их нет или они устарели)"""
+        mimetype = mimetypes.guess_type(path)[0]
+        if len(data) < self.min_size or mimetype not in COMPRESSIBLE_MIMETYPES:
+            return []
+        
+        encodings = []
+        for encoding in available_encodings():
+            target = path + SUFFIXES[encoding]
+            try:
+                if (not os.path.exists(target)
+                        or os.path.getmtime(target) < os.path.getmtime(path)):
+                    self._write(target, compress(data, encoding, self.level))
+            except OSError:
+                # Каталог только для чтения: отдаем файл без сжатия
+                continue
+            encodings.append(encoding)
+        return encodings
+    
+    @staticmethod
+    def _write(target, data):
+        """Атомарная запись: файл собирается во временном и заменяет target.
+        
+        create_app вызывают все процессы (воркеры gunicorn и uvicorn), и
+        другой процесс не должен отдать наполовину записанный файл. Имя
+        временного файла оканчивается тем же суффиксом (.br/.gz), поэтому
+        build() его не обходит.
+        """
+        directory, name = os.path.split(target)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix=os.path.splitext(name)[1])
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def init_assets(app):
+    """Раздача /static с хешами в именах, предсжатыми файлами и Cache-Control"""
+    manifest = AssetManifest(
+        app.static_folder,
+        min_size=app.config['COMPRESS_MIN_SIZE']
+    ).build()
+    app.extensions['assets'] = manifest
+    
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        # url_for('static', filename='css/app.css') -> /static/css/app.<hash>.css
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.hashed.get(values['filename'], values['filename'])
+    
+    def static(filename):
+        original = manifest.originals.get(filename)
+        if original is None:
+            if filename not in manifest.hashed:
+                abort(404)
+            original = filename
+        
+        encoding = None
+        if manifest.encodings.get(original):
+            encoding = negotiate_encoding(manifest.encodings[original])
+        
+        # Имя с хешем меняется вместе с содержимым, поэтому кешируется навсегда
+        immutable = filename != original
+        response = send_from_directory(
+            app.static_folder,
+            original + SUFFIXES[encoding] if encoding else original,
+            mimetype=mimetypes.guess_type(original)[0],
+            max_age=app.config['STATIC_HASHED_MAX_AGE' if immutable else 'STATIC_MAX_AGE']
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if manifest.encodings.get(original):
+            response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.immutable = True
+        return response
+    
+    app.view_functions['static'] = static
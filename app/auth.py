@@ -1,7 +1,6 @@
-import hashlib
-import secrets
 from flask_login import UserMixin
 from .database import db
+from .passwords import PasswordHasherBusy, hasher
 
 class User(UserMixin):
     """Класс пользователя для Flask-Login"""
@@ -27,22 +26,26 @@ class User(UserMixin):
     
     @staticmethod
     def hash_password(password):
-        """Хеширование пароля с солью"""
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return f'{salt}${password_hash}'
+        """Хеширование пароля (алгоритм задается в конфигурации)"""
+        return hasher.hash(password)
     
     def check_password(self, password):
-        """Проверка пароля"""
-        if not self.password_hash:
-            return False
+        """Проверка пароля.
         
-        try:
-            salt, stored_hash = self.password_hash.split('$')
-            test_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-            return test_hash == stored_hash
-        except:
+        Хеш, созданный устаревшим алгоритмом или с другой стоимостью,
+        после успешной проверки прозрачно пересчитывается.
+        """
+        if not hasher.verify(password, self.password_hash):
             return False
+        
+        if hasher.needs_rehash(self.password_hash):
+            # Пароль уже проверен: если очередь хеширования занята, пересчет
+            # откладывается до следующего входа, а вход не отклоняется
+            try:
+                self.change_password(password)
+            except PasswordHasherBusy:
+                pass
+        return True
     
     def to_dict(self):
         """Преобразование в словарь"""
@@ -0,0 +1,61 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него используется только gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'application/json',
+    'application/javascript', 'text/javascript', 'image/svg+xml',
+)
+
+
+def available_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения"""
+    return ['br', 'gzip'] if brotli else ['gzip']
+
+
+def compress(data, encoding, level=6):
+    """Сжатие данных указанной кодировкой (br или gzip)"""
+    if encoding == 'br':
+        # Уровень gzip 1-9 примерно соответствует quality brotli 1-11
+        return brotli.compress(data, quality=min(11, level + 2))
+    # mtime=0 делает результат детерминированным (важно для ETag)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding(offered):
+    """Выбор кодировки по заголовку Accept-Encoding клиента"""
+    return request.accept_encodings.best_match(offered)
+
+
+def init_compression(app):
+    """Сжатие HTML и JSON ответов больше порогового размера"""
+    
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.status_code in (204, 304)):
+            return response
+        
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding(available_encodings())
+        if not encoding:
+            return response
+        
+        response.set_data(compress(data, encoding, app.config['COMPRESS_LEVEL']))
+        response.headers['Content-Encoding'] = encoding
+        # ETag несжатого тела не совпадает со сжатым, делаем его слабым
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
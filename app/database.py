@@ -1,24 +1,114 @@
 import sqlite3
 import os
+import threading
+import time
 from datetime import datetime
 from contextlib import contextmanager
 
+from .query import QueryBuilder
+
 class Database:
     """Класс для работы с базой данных SQLite"""
     
-    def __init__(self, db_path='task_manager.db'):
+    def __init__(self, db_path='task_manager.db', timeout=5.0, cached_statements=512):
         self.db_path = db_path
+        self.timeout = timeout
+        # Размер кеша подготовленных операторов на соединение (по умолчанию
+        # в sqlite3 - 128); формы запросов QueryBuilder повторяются, поэтому
+        # оператор компилируется один раз на соединение
+        self.cached_statements = cached_statements
+        self.queries = None
+        # Соединения живут в пределах потока и процесса: sqlite3 нельзя
+        # разделять между потоками, а после fork() унаследованный дескриптор
+        # файла базы использовать небезопасно
+        self._local = threading.local()
+        # Соединения, унаследованные через fork(): их нельзя ни использовать,
+        # ни закрывать в дочернем процессе (см. after_fork)
+        self._inherited = []
+        # Операции с базой, выполняющиеся или ожидающие блокировку:
+        # номер операции -> время начала
+        self._in_flight = {}
+        self._in_flight_seq = 0
+        self._in_flight_lock = threading.Lock()
+        # Поток внутри background() (обслуживание базы) не учитывается
+        # в очереди: его долгие операции не означают перегрузку запросами
+        self._background = threading.local()
         self.init_database()
+        self.queries = QueryBuilder(self.load_schema())
+    
+    @property
+    def queue_depth(self):
+        """Текущая очередь к базе в этом процессе"""
+        return len(self._in_flight)
+    
+    @property
+    def oldest_wait(self):
+        """Сколько секунд выполняется самая старая текущая операция.
+        
+        Включает ожидание блокировки записи (busy_timeout), поэтому растет,
+        когда база перегружена, независимо от числа потоков в процессе.
+        Фоновые операции (см. background) не учитываются.
+        """
+        with self._in_flight_lock:
+            started = min(self._in_flight.values(), default=None)
+        return 0.0 if started is None else time.monotonic() - started
     
     def get_connection(self):
-        """Получение соединения с базой данных"""
-        conn = sqlite3.connect(self.db_path)
+        """Получение соединения с базой данных (одно на поток и процесс)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                               cached_statements=self.cached_statements)
         conn.row_factory = sqlite3.Row  # Возвращает строки как словари
+        conn.execute('PRAGMA busy_timeout = %d' % int(self.timeout * 1000))
+        self._local.conn = conn
+        self._local.pid = os.getpid()
         return conn
     
+    def close(self):
+        """Закрытие соединения текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+    
+    def after_fork(self):
+        """Сброс соединений, унаследованных от родительского процесса.
+        
+        Вызывается в рабочем процессе сразу после fork(). Мастер закрывает
+        свое соединение до fork() (pre_fork в gunicorn.conf.py), но если
+        соединение все же унаследовано, закрывать его в воркере нельзя:
+        sqlite3_close для копии дескриптора после fork() SQLite не
+        поддерживает. Поэтому ссылка на него сохраняется (иначе сборщик
+        мусора закроет его), а воркер откроет собственное при первом запросе.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._inherited.append(conn)
+        self._local = threading.local()
+    
+    @contextmanager
+    def background(self):
+        """Операции текущего потока внутри блока не попадают в queue_depth
+        и oldest_wait (фоновое обслуживание, а не запросы пользователей)"""
+        previous = getattr(self._background, 'active', False)
+        self._background.active = True
+        try:
+            yield
+        finally:
+            self._background.active = previous
+    
     @contextmanager
     def get_cursor(self):
         """Контекстный менеджер для работы с курсором"""
+        op = None
+        if not getattr(self._background, 'active', False):
+            with self._in_flight_lock:
+                self._in_flight_seq += 1
+                op = self._in_flight_seq
+                self._in_flight[op] = time.monotonic()
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
@@ -28,11 +118,21 @@ class Database:
             conn.rollback()
             raise e
         finally:
-            conn.close()
+            cursor.close()
+            if op is not None:
+                with self._in_flight_lock:
+                    del self._in_flight[op]
     
     def init_database(self):
         """Инициализация базы данных и создание таблиц"""
         with self.get_cursor() as cursor:
+            # Освобожденные страницы возвращаются через PRAGMA incremental_vacuum
+            # (действует только для новой базы, до создания таблиц)
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            
+            # WAL позволяет читателям из разных воркеров не блокировать запись
+            cursor.execute('PRAGMA journal_mode = WAL')
+            
             # Создание таблицы пользователей
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS users (
@@ -58,30 +158,132 @@ class Database:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     user_id INTEGER NOT NULL,
+                    change_seq INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
                 )
             ''')
             
+            # Номер изменения задачи: общий счетчик увеличивается триггерами
+            # при каждой вставке и изменении. В отличие от updated_at (секунды)
+            # номера уникальны и идут в порядке фиксации транзакций, поэтому
+            # служат курсором ленты изменений и версией карточки задачи
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS task_change_seq (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    value INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO task_change_seq (id) VALUES (1)')
+            
+            cursor.execute('PRAGMA table_info(tasks)')
+            if 'change_seq' not in [row['name'] for row in cursor.fetchall()]:
+                # База создана до появления change_seq: нумеруем задачи по id
+                cursor.execute('ALTER TABLE tasks ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0')
+                cursor.execute('UPDATE tasks SET change_seq = id')
+                cursor.execute('UPDATE task_change_seq SET value = (SELECT COALESCE(MAX(id), 0) FROM tasks)')
+            
+            for name, event in (('insert', 'INSERT'),
+                                ('update', 'UPDATE OF title, description, status, priority, '
+                                           'due_date, updated_at, user_id')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS tasks_change_seq_{name} AFTER {event} ON tasks
+                    BEGIN
+                        UPDATE task_change_seq SET value = value + 1 WHERE id = 1;
+                        UPDATE tasks SET change_seq = (SELECT value FROM task_change_seq WHERE id = 1)
+                        WHERE id = NEW.id;
+                    END
+                ''')
+            
+            # Блокировка для выбора воркера, выполняющего обслуживание базы
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_lock (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    owner TEXT,
+                    expires_at REAL DEFAULT 0
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO maintenance_lock (id) VALUES (1)')
+            
+            # Журнал задач обслуживания
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    duration_ms REAL NOT NULL,
+                    pages_reclaimed INTEGER DEFAULT 0,
+                    details TEXT
+                )
+            ''')
+            
+            # Время последнего запуска каждой задачи обслуживания. Хранится
+            # отдельно от журнала: журнал обрезается, и запись редкой задачи
+            # (analyze) вытеснялась бы частыми
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_jobs (
+                    job TEXT PRIMARY KEY,
+                    last_run REAL NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                INSERT OR IGNORE INTO maintenance_jobs (job, last_run)
+                SELECT job, MAX(started_at) FROM maintenance_log
+                WHERE job != 'error' GROUP BY job
+            ''')
+            
+            # Число просроченных задач по пользователям (обновляет фоновая задача)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS overdue_counts (
+                    user_id INTEGER PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    oldest_due DATE,
+                    scanned_at TIMESTAMP NOT NULL
+                )
+            ''')
+            
             # Создание индексов
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_maintenance_log_job ON maintenance_log(job, started_at)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks(user_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority)')
+            # Списки сортируются по дате создания и выбираются через LIMIT/OFFSET
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at)')
+            # Лента изменений: задачи пользователя (или все) после курсора
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_user_change_seq ON tasks(user_id, change_seq)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_change_seq ON tasks(change_seq)')
+            # Частичные индексы по сроку только для незавершенных задач: календарь
+            # и просроченные задачи не читают завершенные, которых большинство.
+            # Запрос использует индекс, только если содержит то же условие
+            # status != 'completed' константой, а не параметром
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_tasks_due_open ON tasks(due_date)
+                WHERE status != 'completed'
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_tasks_user_due_open ON tasks(user_id, due_date)
+                WHERE status != 'completed'
+            ''')
             
             # Проверяем, есть ли администратор
             cursor.execute('SELECT COUNT(*) as count FROM users WHERE is_admin = 1')
             if cursor.fetchone()['count'] == 0:
                 # Создаем администратора по умолчанию
-                import hashlib
-                import secrets
-                
-                admin_password = 'admin123'
-                salt = secrets.token_hex(16)
-                password_hash = hashlib.sha256((admin_password + salt).encode()).hexdigest()
+                from .passwords import hasher
                 
                 cursor.execute('''
                     INSERT INTO users (username, email, password_hash, is_admin, is_active)
                     VALUES (?, ?, ?, ?, ?)
-                ''', ('admin', 'admin@example.com', f'{salt}${password_hash}', 1, 1))
+                ''', ('admin', 'admin@example.com', hasher.hash('admin123'), 1, 1))
+    
+    def load_schema(self):
+        """Таблицы и колонки базы для проверки идентификаторов"""
+        schema = {}
+        tables = self.fetch_rows(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )
+        for (table,) in tables:
+            schema[table] = [row['name'] for row in self.fetch_rows(f'PRAGMA table_info({table})')]
+        return schema
     
     def execute_query(self, query, params=()):
         """Выполнение запроса с параметрами"""
@@ -103,34 +305,39 @@ class Database:
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
     
+    def fetch_rows(self, query, params=()):
+        """Получение всех записей в виде кортежей (без копирования в словари)"""
+        with self.get_cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+    
     def insert(self, table, data):
         """Вставка записи в таблицу"""
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['?' for _ in data])
-        query = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+        query = self.queries.insert(table, tuple(data))
         
         with self.get_cursor() as cursor:
-            cursor.execute(query, list(data.values()))
+            cursor.execute(query, tuple(data.values()))
             return cursor.lastrowid
     
     def update(self, table, data, where):
         """Обновление записи в таблице"""
-        set_clause = ', '.join([f'{key} = ?' for key in data.keys()])
-        where_clause = ' AND '.join([f'{key} = ?' for key in where.keys()])
-        query = f'UPDATE {table} SET {set_clause} WHERE {where_clause}'
+        if not where:
+            raise ValueError('Обновление без условия WHERE запрещено')
+        query = self.queries.update(table, tuple(data), tuple(where))
         
         with self.get_cursor() as cursor:
-            params = list(data.values()) + list(where.values())
+            params = tuple(data.values()) + tuple(where.values())
             cursor.execute(query, params)
             return cursor.rowcount
     
     def delete(self, table, where):
         """Удаление записи из таблицы"""
-        where_clause = ' AND '.join([f'{key} = ?' for key in where.keys()])
-        query = f'DELETE FROM {table} WHERE {where_clause}'
+        if not where:
+            raise ValueError('Удаление без условия WHERE запрещено')
+        query = self.queries.delete(table, tuple(where))
         
         with self.get_cursor() as cursor:
-            cursor.execute(query, list(where.values()))
+            cursor.execute(query, tuple(where.values()))
             return cursor.rowcount
 
 # Глобальный экземпляр базы данных
@@ -0,0 +1,242 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+from .database import db
+from .models import Task
+
+
+class MaintenanceScheduler:
+    """Фоновое обслуживание SQLite: WAL checkpoint, incremental vacuum,
+    PRAGMA optimize, ANALYZE и пересчет просроченных задач.
+
+    Поток запускается в каждом процессе, но задачи выполняет только
+    лидер - процесс, удерживающий аренду в таблице maintenance_lock.
+    Каждая задача работает короткими шагами и не держит блокировку
+    записи дольше одного шага.
+    """
+
+    LOG_KEEP = 500  # сколько последних записей журнала хранить
+
+    def __init__(self, database, tick=30, jobs=None, time_budget=1.0,
+                 vacuum_step=64, analysis_limit=400, logger=None):
+        self.db = database
+        self.logger = logger or logging.getLogger(__name__)
+        self.tick = tick
+        self.jobs = jobs or {}
+        self.time_budget = time_budget
+        self.vacuum_step = vacuum_step
+        self.analysis_limit = analysis_limit
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Запуск потока в текущем процессе (после fork() поток не наследуется)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.owner = f'{socket.gethostname()}:{self._pid}'
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Остановка потока и освобождение аренды"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.tick)
+        self._release_lock()
+        self.db.close()
+
+    def _run(self):
+        # Работа потока не считается очередью запросов к базе и не
+        # включает сброс нагрузки (SHED_DB_WAIT)
+        with self.db.background():
+            self._loop()
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_pending()
+            except Exception as e:
+                # Обслуживание не должно останавливать поток из-за одной ошибки;
+                # если база недоступна, запись в журнал тоже не удастся
+                self.logger.exception('Ошибка обслуживания базы')
+                try:
+                    self._log('error', time.time(), 0, details=str(e))
+                except Exception:
+                    self.logger.exception('Не удалось записать ошибку в maintenance_log')
+
+    def run_pending(self):
+        """Выполнение задач, у которых подошел срок (только на лидере)"""
+        if not self._acquire_lock():
+            return []
+
+        last_runs = {
+            row['job']: row['last_run']
+            for row in self.db.fetch_all('SELECT job, last_run FROM maintenance_jobs')
+        }
+
+        done = []
+        for job, interval in self.jobs.items():
+            if self._stop.is_set():
+                break
+            if time.time() - last_runs.get(job, 0) < interval:
+                continue
+            self.run_job(job)
+            done.append(job)
+
+        if done:
+            self.db.execute_query(
+                'DELETE FROM maintenance_log WHERE id <= '
+                '(SELECT MAX(id) FROM maintenance_log) - ?', (self.LOG_KEEP,)
+            )
+        return done
+
+    def run_job(self, job):
+        """Выполнение одной задачи с записью длительности в журнал"""
+        started = time.time()
+        pages, details = getattr(self, f'_job_{job}')()
+        duration_ms = (time.time() - started) * 1000
+        self._log(job, started, duration_ms, pages, details)
+        self.db.execute_query(
+            'INSERT OR REPLACE INTO maintenance_jobs (job, last_run) VALUES (?, ?)',
+            (job, started)
+        )
+        return pages, details
+
+    # Задачи обслуживания
+
+    def _job_wal_checkpoint(self):
+        # PASSIVE не ждет читателей и писателей, переносит сколько успеет
+        busy, log_pages, checkpointed = self._pragma('wal_checkpoint(PASSIVE)')[0]
+        return 0, f'busy={busy} log={log_pages} checkpointed={checkpointed}'
+
+    def _job_incremental_vacuum(self):
+        if self._pragma('auto_vacuum')[0][0] != 2:
+            # База создана до включения auto_vacuum = INCREMENTAL
+            return 0, 'auto_vacuum != INCREMENTAL, требуется однократный VACUUM'
+
+        before = self._pragma('freelist_count')[0][0]
+        deadline = time.time() + self.time_budget
+        steps = 0
+        # Каждый шаг - отдельная короткая транзакция на vacuum_step страниц
+        while time.time() < deadline and not self._stop.is_set():
+            if self._pragma('freelist_count')[0][0] == 0:
+                break
+            with self.db.get_cursor() as cursor:
+                # executescript() выполняет PRAGMA до конца; execute()
+                # освободил бы только одну страницу за вызов
+                cursor.executescript(f'PRAGMA incremental_vacuum({int(self.vacuum_step)})')
+            steps += 1
+            time.sleep(0.01)  # даем запросам пользователей взять блокировку
+        after = self._pragma('freelist_count')[0][0]
+        return before - after, f'steps={steps} freelist={after}'
+
+    def _job_optimize(self):
+        self._pragma('optimize')
+        return 0, None
+
+    def _job_analyze(self):
+        # analysis_limit ограничивает число просматриваемых строк индекса,
+        # поэтому ANALYZE выполняется за миллисекунды даже на большой базе
+        self._pragma(f'analysis_limit = {int(self.analysis_limit)}')
+        with self.db.get_cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return 0, f'analysis_limit={self.analysis_limit}'
+
+    def _job_overdue_scan(self):
+        # Одна запись по частичному индексу idx_tasks_due_open; страницы
+        # и бейджи читают готовые числа из overdue_counts
+        users, tasks = Task.scan_overdue()
+        return 0, f'users={users} overdue={tasks}'
+
+    # Вспомогательные методы
+
+    def _pragma(self, pragma):
+        with self.db.get_cursor() as cursor:
+            cursor.execute(f'PRAGMA {pragma}')
+            return cursor.fetchall()
+
+    def _acquire_lock(self):
+        """Захват или продление аренды лидера"""
+        now = time.time()
+        with self.db.get_cursor() as cursor:
+            cursor.execute('''
+                UPDATE maintenance_lock SET owner = ?, expires_at = ?
+                WHERE id = 1 AND (owner = ? OR owner IS NULL OR expires_at < ?)
+            ''', (self.owner, now + self.tick * 3, self.owner, now))
+            return cursor.rowcount == 1
+
+    def _release_lock(self):
+        try:
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    'UPDATE maintenance_lock SET owner = NULL, expires_at = 0 '
+                    'WHERE id = 1 AND owner = ?', (self.owner,)
+                )
+        except Exception:
+            pass
+
+    def _log(self, job, started_at, duration_ms, pages=0, details=None):
+        self.db.insert('maintenance_log', {
+            'job': job,
+            'started_at': started_at,
+            'duration_ms': round(duration_ms, 2),
+            'pages_reclaimed': pages,
+            'details': details
+        })
+
+    def status(self, limit=50):
+        """Состояние обслуживания для административного эндпоинта"""
+        lock = self.db.fetch_one('SELECT owner, expires_at FROM maintenance_lock WHERE id = 1')
+        runs = self.db.fetch_all(
+            'SELECT job, started_at, duration_ms, pages_reclaimed, details '
+            'FROM maintenance_log ORDER BY id DESC LIMIT ?', (limit,)
+        )
+        for run in runs:
+            run['started_at'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started_at']))
+
+        return {
+            'leader': lock['owner'] if lock and lock['expires_at'] > time.time() else None,
+            'jobs': self.jobs,
+            'database': {
+                'page_count': self._pragma('page_count')[0][0],
+                'freelist_count': self._pragma('freelist_count')[0][0],
+                'page_size': self._pragma('page_size')[0][0],
+                'auto_vacuum': self._pragma('auto_vacuum')[0][0],
+            },
+            'runs': runs
+        }
+
+
+def init_maintenance(app):
+    """Запуск фонового обслуживания базы в каждом рабочем процессе"""
+    scheduler = MaintenanceScheduler(
+        db,
+        tick=app.config['MAINTENANCE_TICK'],
+        jobs=app.config['MAINTENANCE_JOBS'],
+        time_budget=app.config['MAINTENANCE_TIME_BUDGET'],
+        vacuum_step=app.config['MAINTENANCE_VACUUM_STEP'],
+        logger=app.logger
+    )
+    app.extensions['maintenance'] = scheduler
+
+    if app.config['MAINTENANCE_ENABLED']:
+        # Поток стартует при первом запросе, чтобы при preload_app он
+        # создавался в воркере, а не в мастер-процессе gunicorn
+        @app.before_request
+        def start_maintenance():
+            scheduler.ensure_started()
+
+    return scheduler
@@ -1,4 +1,5 @@
-from datetime import datetime
+import math
+from datetime import datetime, timedelta, timezone
 
 class Task:
     """Класс задачи"""
@@ -6,8 +7,31 @@ class Task:
     STATUS_CHOICES = ['new', 'in_progress', 'completed']
     PRIORITY_CHOICES = ['low', 'medium', 'high']
     
+    # Поля, доступные через API, в порядке вывода. Даты хранятся в базе
+    # в том же текстовом формате, что отдает to_dict(), поэтому строки
+    # можно сериализовать без построения объектов Task
+    API_FIELDS = ['id', 'title', 'description', 'status', 'priority',
+                  'due_date', 'created_at', 'updated_at', 'user_id']
+    _API_COLUMNS = (
+        ('description', "COALESCE(description, '')"),
+    )
+    # Порядок списков; id делает порядок задач с одинаковым created_at стабильным
+    _ORDER = (('created_at', 'DESC'), ('id', 'DESC'))
+    # Условие частичных индексов idx_tasks_due_open / idx_tasks_user_due_open
+    _OPEN = (('status', '!=', 'completed'),)
+    _DUE_ORDER = (('due_date', 'ASC'), ('id', 'ASC'))
+    
+    # Пересчет overdue_counts: целиком (фоновая задача) или для одного
+    # пользователя (после изменения его задачи)
+    _OVERDUE_SCAN = '''
+        INSERT INTO overdue_counts (user_id, count, oldest_due, scanned_at)
+        SELECT user_id, COUNT(*), MIN(due_date), ? FROM tasks
+        WHERE status != 'completed' AND due_date < ? {user_filter}
+        GROUP BY user_id
+    '''
+    
     def __init__(self, id, title, description, status, priority, due_date, 
-                 created_at, updated_at, user_id):
+                 created_at, updated_at, user_id, change_seq=0):
         self.id = id
         self.title = title
         self.description = description or ''
@@ -17,6 +41,7 @@ class Task:
         self.created_at = self._parse_datetime(created_at)  # Парсим datetime
         self.updated_at = self._parse_datetime(updated_at)  # Парсим datetime
         self.user_id = user_id
+        self.change_seq = change_seq  # номер последнего изменения (триггеры в базе)
     
     def _parse_date(self, date_str):
         """Парсинг строки даты в объект datetime.date"""
@@ -76,6 +101,7 @@ class Task:
             'user_id': user_id
         })
         
+        Task.refresh_overdue(user_id)
         return Task.get(task_id)
     
     @staticmethod
@@ -83,7 +109,7 @@ class Task:
         """Получение задачи по ID"""
         from .database import db
         
-        result = db.fetch_one('SELECT * FROM tasks WHERE id = ?', (task_id,))
+        result = db.fetch_one(db.queries.select('tasks', where=('id',)), (task_id,))
         if result:
             return Task(**result)
         return None
@@ -104,90 +130,290 @@ class Task:
                     update_data[key] = value
         
         if update_data:
-            update_data['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            # UTC, как DEFAULT CURRENT_TIMESTAMP при создании задачи
+            now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+            update_data['updated_at'] = now.strftime('%Y-%m-%d %H:%M:%S')
             db.update('tasks', update_data, {'id': self.id})
+            self.updated_at = now
             
             # Обновляем объект
             for key, value in kwargs.items():
                 if key in allowed_fields:
                     setattr(self, key, value)
+            
+            if 'status' in update_data or 'due_date' in update_data:
+                Task.refresh_overdue(self.user_id)
     
     def delete(self):
         """Удаление задачи"""
         from .database import db
         db.delete('tasks', {'id': self.id})
+        Task.refresh_overdue(self.user_id)
+    
+    @staticmethod
+    def _filters(user_id=None, status=None, priority=None):
+        """Условия фильтрации: форма запроса (колонки) и параметры"""
+        where = []
+        params = []
+        for column, value in (('user_id', user_id), ('status', status), ('priority', priority)):
+            if value:
+                where.append(column)
+                params.append(value)
+        return tuple(where), params
+    
+    @staticmethod
+    def _paginate(user_id=None, status=None, priority=None, page=1, per_page=10):
+        """Страница задач: подсчет и LIMIT/OFFSET выполняются в SQL"""
+        from .database import db
+        
+        where, params = Task._filters(user_id, status, priority)
+        total = db.fetch_one(db.queries.count('tasks', where), params)['count']
+        
+        query = db.queries.select('tasks', where=where, order_by=Task._ORDER,
+                                  limit=True, offset=True)
+        rows = db.fetch_all(query, params + [per_page, max(page - 1, 0) * per_page])
+        
+        return {
+            'tasks': [Task(**task) for task in rows],
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+            'current_page': page
+        }
     
     @staticmethod
     def get_user_tasks(user_id, status=None, priority=None, page=1, per_page=10):
         """Получение задач пользователя с фильтрацией и пагинацией"""
-        from .database import db
+        return Task._paginate(user_id=user_id, status=status, priority=priority,
+                              page=page, per_page=per_page)
+    
+    @staticmethod
+    def get_all_tasks(status=None, priority=None, user_id=None, page=1, per_page=10):
+        """Получение всех задач (для администратора)"""
+        return Task._paginate(user_id=user_id, status=status, priority=priority,
+                              page=page, per_page=per_page)
+    
+    def get_author(self):
+        """Получение автора задачи"""
+        from .auth import User
+        return User.get(self.user_id)
+    
+    @staticmethod
+    def parse_fields(fields_str):
+        """Разбор параметра ?fields=id,title,... 
         
-        query = 'SELECT * FROM tasks WHERE user_id = ?'
-        params = [user_id]
+        Возвращает список полей в порядке API_FIELDS или ValueError
+        со списком неизвестных полей.
+        """
+        if not fields_str:
+            return list(Task.API_FIELDS)
         
-        if status:
-            query += ' AND status = ?'
-            params.append(status)
+        requested = {f.strip() for f in fields_str.split(',') if f.strip()}
+        unknown = requested.difference(Task.API_FIELDS)
+        if unknown:
+            raise ValueError(', '.join(sorted(unknown)))
+        if not requested:
+            return list(Task.API_FIELDS)
+        return [f for f in Task.API_FIELDS if f in requested]
+    
+    @staticmethod
+    def parse_poll_timeout(value, max_timeout):
+        """Разбор параметра ?timeout= long polling.
         
-        if priority:
-            query += ' AND priority = ?'
-            params.append(priority)
+        Возвращает секунды ожидания в [0, max_timeout] или ValueError:
+        nan и inf не допускаются, иначе ожидание никогда не закончится.
+        """
+        if not value:
+            return 0
+        try:
+            timeout = float(value)
+        except ValueError:
+            raise ValueError('Неверное значение timeout')
+        if not math.isfinite(timeout):
+            raise ValueError('Неверное значение timeout')
+        return min(max(timeout, 0), max_timeout)
+    
+    @staticmethod
+    def get_rows(fields, user_id=None, status=None, priority=None, limit=100):
+        """Получение задач в виде словарей для API (без объектов Task).
         
-        query += ' ORDER BY created_at DESC'
+        Выбираются только запрошенные колонки, а LIMIT и подсчет
+        выполняются в SQL.
+        """
+        from .database import db
         
-        # Получаем все задачи для пагинации
-        all_tasks = db.fetch_all(query, params)
+        where, params = Task._filters(user_id, status, priority)
+        total = db.fetch_one(db.queries.count('tasks', where), params)['count']
         
-        # Пагинация
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_tasks = all_tasks[start:end]
+        query = db.queries.select('tasks', tuple(fields), where=where, order_by=Task._ORDER,
+                                  limit=True, expressions=Task._API_COLUMNS)
+        rows = db.fetch_rows(query, params + [limit])
         
         return {
-            'tasks': [Task(**task) for task in paginated_tasks],
-            'total': len(all_tasks),
-            'pages': (len(all_tasks) + per_page - 1) // per_page,
-            'current_page': page
+            'tasks': [dict(zip(fields, row)) for row in rows],
+            'total': total
         }
     
     @staticmethod
-    def get_all_tasks(status=None, priority=None, user_id=None, page=1, per_page=10):
-        """Получение всех задач (для администратора)"""
+    def parse_cursor(value):
+        """Разбор параметра ?since= ленты изменений (номер change_seq)"""
+        if not value:
+            return None
+        try:
+            cursor = int(value)
+        except ValueError:
+            raise ValueError('Неверное значение since')
+        if cursor < 0:
+            raise ValueError('Неверное значение since')
+        return cursor
+    
+    @staticmethod
+    def get_changed_rows(fields, since=None, user_id=None, limit=100):
+        """Задачи, измененные после курсора since (для long polling).
+        
+        Курсор - change_seq последней возвращенной задачи, поэтому если
+        изменений больше limit, следующий запрос продолжит с того же места.
+        Без since лента читается с начала.
+        """
         from .database import db
         
-        query = 'SELECT * FROM tasks WHERE 1=1'
-        params = []
+        where, params = Task._filters(user_id)
+        where += (('change_seq', '>'),)
+        params.append(since or 0)
+        
+        query_fields = tuple(fields) + ('change_seq',)
+        query = db.queries.select('tasks', query_fields, where=where,
+                                  order_by=(('change_seq', 'ASC'),), limit=True,
+                                  expressions=Task._API_COLUMNS)
+        rows = db.fetch_rows(query, params + [limit])
+        
+        return {
+            'tasks': [{f: row[f] for f in fields} for row in rows],
+            'cursor': rows[-1]['change_seq'] if rows else since or 0
+        }
+    
+    @staticmethod
+    def parse_api_update(data):
+        """Проверка тела PUT /api/task/<id>; ValueError с текстом ошибки"""
+        if not isinstance(data, dict):
+            raise ValueError('Ожидается JSON-объект')
+        
+        allowed_fields = ['title', 'description', 'status', 'priority', 'due_date']
+        update_data = {k: v for k, v in data.items() if k in allowed_fields}
+        
+        if 'due_date' in update_data and update_data['due_date']:
+            try:
+                update_data['due_date'] = datetime.strptime(
+                    update_data['due_date'], '%Y-%m-%d'
+                ).date()
+            except (ValueError, TypeError):
+                raise ValueError('Неверный формат даты')
         
-        if status:
-            query += ' AND status = ?'
-            params.append(status)
+        return update_data
+    
+    @staticmethod
+    def get_row(task_id, fields):
+        """Получение одной задачи в виде словаря для API"""
+        from .database import db
+        
+        query = db.queries.select('tasks', tuple(fields), where=('id',),
+                                  expressions=Task._API_COLUMNS)
+        rows = db.fetch_rows(query, (task_id,))
+        return dict(zip(fields, rows[0])) if rows else None
+    
+    @staticmethod
+    def parse_due_range(date_from, date_to, default_days=7, max_days=366):
+        """Разбор параметров ?from=&to= календаря (ГГГГ-ММ-ДД, включительно).
         
-        if priority:
-            query += ' AND priority = ?'
-            params.append(priority)
+        По умолчанию - default_days дней, начиная с сегодняшнего. Интервал
+        длиннее max_days дней (считая обе границы) не допускается.
+        Возвращает пару дат или ValueError с текстом ошибки.
+        """
+        try:
+            start = (datetime.strptime(date_from, '%Y-%m-%d').date()
+                     if date_from else datetime.now().date())
+            end = (datetime.strptime(date_to, '%Y-%m-%d').date()
+                   if date_to else start + timedelta(days=default_days - 1))
+        except ValueError:
+            raise ValueError('Неверный формат даты, ожидается ГГГГ-ММ-ДД')
         
-        if user_id:
-            query += ' AND user_id = ?'
-            params.append(user_id)
+        if end < start:
+            raise ValueError('Дата to раньше даты from')
+        if (end - start).days + 1 > max_days:
+            raise ValueError(f'Интервал больше {max_days} дней')
+        return start, end
+    
+    @staticmethod
+    def get_due_rows(fields, date_from=None, date_to=None, user_id=None, limit=500):
+        """Незавершенные задачи со сроком в интервале [date_from, date_to].
         
-        query += ' ORDER BY created_at DESC'
+        Без date_from - все задачи со сроком до date_to (просроченные при
+        date_to = вчера). Диапазон по due_date читается из частичного
+        индекса, завершенные задачи не просматриваются.
+        """
+        from .database import db
         
-        # Получаем все задачи для пагинации
-        all_tasks = db.fetch_all(query, params)
+        where, params = Task._filters(user_id)
+        where += Task._OPEN
+        if date_from:
+            where += (('due_date', '>='),)
+            params.append(date_from.strftime('%Y-%m-%d'))
+        where += (('due_date', '<='),)
+        params.append(date_to.strftime('%Y-%m-%d'))
         
-        # Пагинация
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_tasks = all_tasks[start:end]
+        total = db.fetch_one(db.queries.count('tasks', where), params)['count']
+        query = db.queries.select('tasks', tuple(fields), where=where, order_by=Task._DUE_ORDER,
+                                  limit=True, expressions=Task._API_COLUMNS)
+        rows = db.fetch_rows(query, params + [limit])
         
         return {
-            'tasks': [Task(**task) for task in paginated_tasks],
-            'total': len(all_tasks),
-            'pages': (len(all_tasks) + per_page - 1) // per_page,
-            'current_page': page
+            'tasks': [dict(zip(fields, row)) for row in rows],
+            'total': total
         }
     
-    def get_author(self):
-        """Получение автора задачи"""
-        from .auth import User
-        return User.get(self.user_id)
\ No newline at end of file
+    @staticmethod
+    def get_overdue_rows(fields, user_id=None, limit=500):
+        """Незавершенные задачи со сроком раньше сегодняшнего дня"""
+        yesterday = datetime.now().date() - timedelta(days=1)
+        return Task.get_due_rows(fields, date_to=yesterday, user_id=user_id, limit=limit)
+    
+    @staticmethod
+    def scan_overdue():
+        """Полный пересчет overdue_counts; возвращает (пользователей, задач).
+        
+        Выполняется фоновой задачей обслуживания: после смены даты задачи
+        становятся просроченными без какого-либо изменения в базе.
+        """
+        from .database import db
+        
+        now = datetime.now()
+        with db.get_cursor() as cursor:
+            cursor.execute('DELETE FROM overdue_counts')
+            cursor.execute(Task._OVERDUE_SCAN.format(user_filter=''),
+                           (now.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d')))
+            cursor.execute('SELECT COUNT(*), COALESCE(SUM(count), 0) FROM overdue_counts')
+            return tuple(cursor.fetchone())
+    
+    @staticmethod
+    def refresh_overdue(user_id):
+        """Пересчет числа просроченных задач одного пользователя"""
+        from .database import db
+        
+        now = datetime.now()
+        with db.get_cursor() as cursor:
+            cursor.execute('DELETE FROM overdue_counts WHERE user_id = ?', (user_id,))
+            cursor.execute(Task._OVERDUE_SCAN.format(user_filter='AND user_id = ?'),
+                           (now.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d'), user_id))
+    
+    @staticmethod
+    def get_overdue_count(user_id=None):
+        """Число просроченных задач из overdue_counts (без сканирования задач).
+        
+        Без user_id - сумма по всем пользователям (для администратора).
+        """
+        from .database import db
+        
+        if user_id is None:
+            row = db.fetch_one('SELECT COALESCE(SUM(count), 0) as count FROM overdue_counts')
+        else:
+            row = db.fetch_one('SELECT count FROM overdue_counts WHERE user_id = ?', (user_id,))
+        return row['count'] if row else 0
\ No newline at end of file
@@ -0,0 +1,172 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class PasswordHasherBusy(Exception):
+    """Очередь на хеширование паролей переполнена"""
+
+
+class PasswordHasher:
+    """Хеширование паролей через PBKDF2 или scrypt из hashlib.
+
+    Вычисления выполняются в ограниченном пуле потоков (hashlib отпускает
+    GIL на время KDF), а очередь к пулу ограничена: при всплеске входов
+    лишние попытки сразу получают PasswordHasherBusy, а не занимают
+    потоки, обслуживающие остальные запросы.
+
+    Форматы хранения:
+        pbkdf2_sha256$<iterations>$<salt>$<hash>
+        scrypt$<n>$<r>$<p>$<salt>$<hash>
+        <salt>$<hash>  - прежний SHA-256 с солью (только проверка)
+    """
+
+    ALGORITHMS = ('pbkdf2_sha256', 'scrypt')
+
+    def __init__(self, algorithm='pbkdf2_sha256', iterations=600000,
+                 scrypt_n=2 ** 14, scrypt_r=8, scrypt_p=1,
+                 workers=2, max_queue=16, timeout=10):
+        self.configure(algorithm, iterations, scrypt_n, scrypt_r, scrypt_p,
+                       workers, max_queue, timeout)
+
+    def configure(self, algorithm='pbkdf2_sha256', iterations=600000,
+                  scrypt_n=2 ** 14, scrypt_r=8, scrypt_p=1,
+                  workers=2, max_queue=16, timeout=10):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f'Неизвестный алгоритм хеширования: {algorithm}')
+        self.algorithm = algorithm
+        self.iterations = iterations
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._dummy = None
+        if getattr(self, '_pool', None) and self._pid == os.getpid():
+            self._pool.shutdown(wait=False)
+        self._pool = None
+        self._pid = None
+
+    def _executor(self):
+        # Потоки пула не переживают fork(), поэтому пул создается в каждом процессе
+        if self._pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='password-hash')
+            self._pid = os.getpid()
+        return self._pool
+
+    def _submit(self, func, *args):
+        """Выполнение в пуле с ограничением очереди.
+
+        Место в очереди освобождается, когда задание завершено или
+        отменено, а не когда вызывающий перестал ждать: иначе после
+        таймаутов в пуле копились бы задания сверх workers + max_queue.
+        """
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor().submit(func, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Задание, еще не взятое потоком, снимается с очереди
+            future.cancel()
+            raise PasswordHasherBusy()
+
+    # Алгоритмы
+
+    @staticmethod
+    def _pbkdf2(password, salt, iterations):
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+
+    @staticmethod
+    def _scrypt(password, salt, n, r, p):
+        # maxmem с запасом: scrypt требует ~128 * n * r байт
+        return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                              maxmem=256 * n * r + 1024 * 1024).hex()
+
+    @staticmethod
+    def _legacy_sha256(password, salt):
+        return hashlib.sha256((password + salt).encode()).hexdigest()
+
+    def _encode(self, password):
+        salt = secrets.token_hex(16)
+        if self.algorithm == 'scrypt':
+            n, r, p = self.scrypt_n, self.scrypt_r, self.scrypt_p
+            return f'scrypt${n}${r}${p}${salt}${self._scrypt(password, salt, n, r, p)}'
+        return f'pbkdf2_sha256${self.iterations}${salt}${self._pbkdf2(password, salt, self.iterations)}'
+
+    def _check(self, password, stored):
+        parts = stored.split('$')
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            test_hash = self._pbkdf2(password, parts[2], int(parts[1]))
+        elif parts[0] == 'scrypt' and len(parts) == 6:
+            test_hash = self._scrypt(password, parts[4], int(parts[1]), int(parts[2]), int(parts[3]))
+        elif len(parts) == 2:
+            test_hash = self._legacy_sha256(password, parts[0])
+        else:
+            return False
+        return hmac.compare_digest(test_hash, parts[-1])
+
+    # Публичный интерфейс
+
+    def hash(self, password):
+        """Хеширование пароля текущим алгоритмом"""
+        return self._submit(self._encode, password)
+
+    def verify(self, password, stored):
+        """Проверка пароля против сохраненного хеша любого формата"""
+        if not password or not stored:
+            return False
+        try:
+            return self._submit(self._check, password, stored)
+        except (ValueError, TypeError):
+            return False
+
+    def verify_dummy(self, password):
+        """Проверка против хеша случайного пароля; всегда False.
+
+        Вызывается, когда пользователь не найден: вход с несуществующим
+        именем занимает столько же времени, сколько с неверным паролем,
+        и по времени ответа нельзя перебрать существующие имена.
+        """
+        if self._dummy is None:
+            self._dummy = self.hash(secrets.token_hex(16))
+        self.verify(password, self._dummy)
+        return False
+
+    def needs_rehash(self, stored):
+        """True, если хеш создан другим алгоритмом или с другой стоимостью"""
+        parts = stored.split('$')
+        if self.algorithm == 'scrypt':
+            return parts[:4] != ['scrypt', str(self.scrypt_n), str(self.scrypt_r), str(self.scrypt_p)]
+        return parts[:2] != ['pbkdf2_sha256', str(self.iterations)]
+
+
+def init_passwords(app):
+    """Настройка хеширования паролей из конфигурации приложения"""
+    hasher.configure(
+        algorithm=app.config['PASSWORD_ALGORITHM'],
+        iterations=app.config['PASSWORD_PBKDF2_ITERATIONS'],
+        scrypt_n=app.config['PASSWORD_SCRYPT_N'],
+        scrypt_r=app.config['PASSWORD_SCRYPT_R'],
+        scrypt_p=app.config['PASSWORD_SCRYPT_P'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_queue=app.config['PASSWORD_HASH_QUEUE']
+    )
+    return hasher
+
+
+# Глобальный экземпляр (настраивается в create_app)
+hasher = PasswordHasher()
@@ -0,0 +1,131 @@
+import threading
+
+
+class QueryBuilder:
+    """Построение SQL для простых запросов с кешированием по форме запроса.
+
+    Имена таблиц и колонок проверяются по схеме базы (PRAGMA table_info),
+    поэтому в SQL не может попасть произвольный идентификатор. Каждая
+    уникальная форма запроса (таблица, колонки, условия, сортировка)
+    собирается в строку один раз; одинаковый текст SQL позволяет sqlite3
+    повторно использовать подготовленный оператор (cached_statements).
+
+    Условия where задаются кортежем колонок ('user_id', 'status') -
+    сравнение на равенство - или пар (колонка, оператор): ('updated_at', '>').
+    Тройка (колонка, оператор, значение) подставляет константу из кода
+    приложения прямо в SQL: ('status', '!=', 'completed'). Так планировщик
+    SQLite может выбрать частичный индекс с тем же условием - с параметром
+    ? он не знает значение при подготовке запроса.
+    """
+
+    OPERATORS = frozenset(['=', '!=', '<', '<=', '>', '>='])
+    DIRECTIONS = frozenset(['ASC', 'DESC'])
+
+    def __init__(self, schema):
+        self.schema = {table: frozenset(columns) for table, columns in schema.items()}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, key, build):
+        sql = self._cache.get(key)
+        if sql is None:
+            sql = build()
+            with self._lock:
+                self._cache[key] = sql
+        return sql
+
+    # Проверка идентификаторов
+
+    def _table(self, table):
+        if table not in self.schema:
+            raise ValueError(f'Неизвестная таблица: {table}')
+        return table
+
+    def _column(self, table, column):
+        if column not in self.schema[table]:
+            raise ValueError(f'Неизвестная колонка {table}.{column}')
+        return column
+
+    @staticmethod
+    def _literal(value):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f'Недопустимое значение в условии: {value!r}')
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return repr(value)
+
+    def _where(self, table, where):
+        if not where:
+            return ''
+        clauses = []
+        for item in where:
+            if isinstance(item, str):
+                item = (item, '=')
+            column, op = item[:2]
+            if op not in self.OPERATORS:
+                raise ValueError(f'Недопустимый оператор: {op}')
+            value = self._literal(item[2]) if len(item) == 3 else '?'
+            clauses.append(f'{self._column(table, column)} {op} {value}')
+        return ' WHERE ' + ' AND '.join(clauses)
+
+    # Формы запросов
+
+    def insert(self, table, columns):
+        def build():
+            self._table(table)
+            names = ', '.join(self._column(table, c) for c in columns)
+            placeholders = ', '.join('?' for _ in columns)
+            return f'INSERT INTO {table} ({names}) VALUES ({placeholders})'
+        return self._cached(('insert', table, columns), build)
+
+    def update(self, table, columns, where):
+        def build():
+            self._table(table)
+            set_clause = ', '.join(f'{self._column(table, c)} = ?' for c in columns)
+            return f'UPDATE {table} SET {set_clause}' + self._where(table, where)
+        return self._cached(('update', table, columns, where), build)
+
+    def delete(self, table, where):
+        def build():
+            self._table(table)
+            return f'DELETE FROM {table}' + self._where(table, where)
+        return self._cached(('delete', table, where), build)
+
+    def count(self, table, where=()):
+        def build():
+            self._table(table)
+            return f'SELECT COUNT(*) as count FROM {table}' + self._where(table, where)
+        return self._cached(('count', table, where), build)
+
+    def select(self, table, columns=None, where=(), order_by=(), limit=False,
+               offset=False, expressions=()):
+        """SELECT с проверкой колонок.
+
+        expressions - пары (колонка, SQL-выражение) из кода приложения,
+        подставляемые вместо колонки: ('description', "COALESCE(description, '')").
+        limit/offset - флаги наличия параметров LIMIT ?/OFFSET ?.
+        """
+        def build():
+            self._table(table)
+            if columns is None:
+                select_list = '*'
+            else:
+                exprs = dict(expressions)
+                select_list = ', '.join(
+                    f'{exprs[c]} AS {c}' if c in exprs else c
+                    for c in (self._column(table, c) for c in columns)
+                )
+            sql = f'SELECT {select_list} FROM {table}' + self._where(table, where)
+            if order_by:
+                parts = []
+                for column, direction in order_by:
+                    if direction not in self.DIRECTIONS:
+                        raise ValueError(f'Недопустимое направление сортировки: {direction}')
+                    parts.append(f'{self._column(table, column)} {direction}')
+                sql += ' ORDER BY ' + ', '.join(parts)
+            if limit:
+                sql += ' LIMIT ?'
+            if offset:
+                sql += ' OFFSET ?'
+            return sql
+        return self._cached(('select', table, columns, where, order_by, limit, offset, expressions), build)
@@ -0,0 +1,169 @@
+import hashlib
+import math
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+
+from flask import request, jsonify, make_response
+from flask_login import current_user
+
+from .database import db
+
+
+def _take(tokens, last, now, rate, burst):
+    """Один шаг token bucket: пополнение и списание одного токена.
+
+    Возвращает (разрешено, остаток токенов, секунд до следующего токена).
+    """
+    tokens = min(burst, tokens + (now - last) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """Корзины в памяти процесса: ключ -> [токены, время последнего запроса]"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                bucket = self._buckets[key] = [burst, now]
+            allowed, bucket[0], retry_after = _take(bucket[0], bucket[1], now, rate, burst)
+            bucket[1] = now
+            return allowed, retry_after
+
+    def _evict(self, now, idle=300):
+        """Удаление корзин, к которым давно не обращались"""
+        stale = [k for k, (_, last) in self._buckets.items() if now - last > idle]
+        for key in stale or list(self._buckets)[:len(self._buckets) // 10]:
+            del self._buckets[key]
+
+
+class SharedBucketStore:
+    """Корзины в анонимной разделяемой памяти (mmap), общей для воркеров.
+
+    Создается в мастер-процессе до fork() (preload_app в gunicorn).
+    Таблица фиксированного размера с открытой адресацией: слот хранит
+    64-битный хеш ключа, число токенов и время последнего запроса.
+    При переполнении вытесняется слот с самым старым запросом.
+    """
+
+    SLOT = struct.Struct('Qdd')
+    PROBES = 8
+
+    def __init__(self, slots=65536):
+        self.slots = slots
+        self._mem = mmap.mmap(-1, slots * self.SLOT.size)
+        self._lock = multiprocessing.Lock()
+
+    def hit(self, key, rate, burst):
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+        # time.time(), а не monotonic: значение сравнивается между процессами
+        now = time.time()
+        start = key_hash % self.slots
+
+        with self._lock:
+            victim, victim_last = None, None
+            for i in range(self.PROBES):
+                offset = ((start + i) % self.slots) * self.SLOT.size
+                slot_hash, tokens, last = self.SLOT.unpack_from(self._mem, offset)
+                if slot_hash == key_hash:
+                    break
+                if slot_hash == 0:
+                    tokens, last = burst, now
+                    break
+                if victim is None or last < victim_last:
+                    victim, victim_last = offset, last
+            else:
+                offset, tokens, last = victim, burst, now
+
+            allowed, tokens, retry_after = _take(tokens, last, now, rate, burst)
+            self.SLOT.pack_into(self._mem, offset, key_hash, tokens, now)
+            return allowed, retry_after
+
+
+class RateLimiter:
+    """Ограничение частоты запросов по группам эндпоинтов"""
+
+    def __init__(self, store, groups):
+        self.store = store
+        self.groups = groups
+
+    def match(self, path, method):
+        for name, group in self.groups.items():
+            if path.startswith(tuple(group['paths'])) and method in group.get('methods', (method,)):
+                return name, group
+        return None, None
+
+    def key(self, name, group):
+        if group.get('by') == 'user' and current_user.is_authenticated:
+            return f'{name}:u:{current_user.id}'
+        return f'{name}:ip:{request.remote_addr}'
+
+    def check(self):
+        """Возвращает None, если запрос разрешен, иначе секунды до повтора"""
+        name, group = self.match(request.path, request.method)
+        if group is None:
+            return None
+        allowed, retry_after = self.store.hit(self.key(name, group), group['rate'], group['burst'])
+        return None if allowed else retry_after
+
+
+def db_overloaded(config, waiting):
+    """True, если новый запрос стоит сразу отклонить из-за нагрузки на базу.
+
+    waiting - операции, ожидающие базу в этом процессе. С синхронным
+    сервером их не больше числа потоков, поэтому главным признаком служит
+    время самой старой текущей операции (включая ожидание блокировки).
+    """
+    depth = config['SHED_DB_QUEUE_DEPTH']
+    if depth and waiting >= depth:
+        return True
+    max_wait = config['SHED_DB_WAIT']
+    return bool(max_wait) and db.oldest_wait >= max_wait
+
+
+def _reject(status, message, retry_after):
+    if request.path.startswith('/api/'):
+        response = make_response(jsonify({'error': message}), status)
+    else:
+        response = make_response(message, status)
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def init_ratelimit(app):
+    """Token bucket для API и входа, сброс нагрузки при очереди к базе"""
+    store = (SharedBucketStore(app.config['RATELIMIT_SHARED_SLOTS'])
+             if app.config['RATELIMIT_STORAGE'] == 'shared' else MemoryBucketStore())
+    limiter = RateLimiter(store, app.config['RATELIMIT_GROUPS'])
+    app.extensions['ratelimit'] = limiter
+
+    @app.before_request
+    def limit_request():
+        if request.endpoint == 'static':
+            return None
+
+        # Сброс нагрузки: если база не успевает, новый запрос получит
+        # ответ не быстрее, поэтому сразу отвечаем 503
+        if db_overloaded(app.config, db.queue_depth):
+            return _reject(503, 'Сервер перегружен, повторите позже', 1)
+
+        if app.config['RATELIMIT_ENABLED']:
+            retry_after = limiter.check()
+            if retry_after is not None:
+                return _reject(429, 'Слишком много запросов', retry_after)
+        return None
+
+    return limiter
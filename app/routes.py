@@ -1,8 +1,11 @@
 from flask import render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime
+import time
 
+from . import api
 from .auth import User
+from .passwords import PasswordHasherBusy, hasher
 from .models import Task
 from .database import db
 
@@ -27,7 +30,16 @@ def init_routes(app):
             
             user = User.get_by_username(username)
             
-            if user and user.check_password(password):
+            try:
+                if user:
+                    password_ok = user.check_password(password)
+                else:
+                    password_ok = hasher.verify_dummy(password)
+            except PasswordHasherBusy:
+                flash('Сервер перегружен, повторите вход через несколько секунд', 'error')
+                return render_template('login.html'), 503
+            
+            if password_ok:
                 if not user.is_active:
                     flash('Аккаунт деактивирован', 'error')
                     return redirect(url_for('login'))
@@ -81,6 +93,9 @@ def init_routes(app):
                 user = User.create(username, email, password)
                 flash('Регистрация выполнена успешно. Теперь вы можете войти.', 'success')
                 return redirect(url_for('login'))
+            except PasswordHasherBusy:
+                flash('Сервер перегружен, повторите регистрацию через несколько секунд', 'error')
+                return render_template('register.html'), 503
             except Exception as e:
                 flash(f'Ошибка при регистрации: {str(e)}', 'error')
                 return redirect(url_for('register'))
@@ -119,11 +134,18 @@ def init_routes(app):
                 per_page=9
             )
         
+        # Число просроченных задач заранее посчитано фоновой задачей
+        overdue_count = Task.get_overdue_count(
+            None if current_user.is_admin else current_user.id
+        )
+        
         return render_template('tasks.html', 
                              tasks=tasks_data['tasks'],
                              pagination=tasks_data,
                              status=status,
-                             priority=priority)
+                             priority=priority,
+                             overdue_count=overdue_count,
+                             today=datetime.now().date())
     
     @app.route('/task/new', methods=['GET', 'POST'])
     @login_required
@@ -310,68 +332,80 @@ def init_routes(app):
                              users=users,
                              status=status,
                              priority=priority,
-                             selected_user_id=user_id)
+                             selected_user_id=user_id,
+                             overdue_count=Task.get_overdue_count(user_id),
+                             today=datetime.now().date())
+    
+    # API маршруты (логика общая с asgi.py, см. api.py)
+    def respond(result):
+        status, body = result
+        return jsonify(body), status
     
-    # API маршруты
     @app.route('/api/tasks')
     @login_required
     def api_tasks():
         """API: Получение задач"""
-        status = request.args.get('status')
-        priority = request.args.get('priority')
-        
-        if current_user.is_admin:
-            tasks = Task.get_all_tasks(status=status, priority=priority, per_page=100)
-        else:
-            tasks = Task.get_user_tasks(
-                user_id=current_user.id,
-                status=status,
-                priority=priority,
-                per_page=100
-            )
+        return respond(api.list_tasks(current_user, request.args))
+    
+    @app.route('/api/tasks/changes')
+    @login_required
+    def api_task_changes():
+        """API: Long polling - ожидание изменений после курсора since"""
+        try:
+            fields, since, timeout = api.parse_changes(request.args, app.config)
+        except api.APIError as e:
+            return jsonify({'error': e.message}), e.status
         
-        return jsonify({
-            'tasks': [task.to_dict() for task in tasks['tasks']],
-            'total': tasks['total']
-        })
+        # Запрос занимает поток воркера на все время ожидания;
+        # для тысяч одновременных ожиданий используйте asgi.py
+        deadline = time.monotonic() + timeout
+        while True:
+            changes = api.changes_page(current_user, fields, since)
+            if api.changes_ready(changes, since) or time.monotonic() >= deadline:
+                return jsonify(changes)
+            time.sleep(max(min(app.config['API_POLL_INTERVAL'], deadline - time.monotonic()), 0))
+    
+    @app.route('/api/tasks/calendar')
+    @login_required
+    def api_task_calendar():
+        """API: Незавершенные задачи со сроком в интервале from..to"""
+        return respond(api.task_calendar(current_user, request.args, app.config))
+    
+    @app.route('/api/tasks/overdue')
+    @login_required
+    def api_tasks_overdue():
+        """API: Просроченные незавершенные задачи"""
+        return respond(api.tasks_overdue(current_user, request.args))
     
     @app.route('/api/task/<int:task_id>', methods=['GET', 'PUT', 'DELETE'])
     @login_required
     def api_task(task_id):
         """API: Работа с конкретной задачей"""
-        task = Task.get(task_id)
-        
-        if not task:
-            return jsonify({'error': 'Задача не найдена'}), 404
-        
-        # Проверка прав доступа
-        if not current_user.is_admin and task.user_id != current_user.id:
-            return jsonify({'error': 'Доступ запрещен'}), 403
-        
         if request.method == 'GET':
-            return jsonify({'task': task.to_dict()})
-        
+            return respond(api.get_task(current_user, task_id, request.args))
         elif request.method == 'PUT':
-            data = request.json
-            
-            # Валидация данных
-            allowed_fields = ['title', 'description', 'status', 'priority', 'due_date']
-            update_data = {k: v for k, v in data.items() if k in allowed_fields}
-            
-            if 'due_date' in update_data and update_data['due_date']:
-                try:
-                    update_data['due_date'] = datetime.strptime(
-                        update_data['due_date'], '%Y-%m-%d'
-                    ).date()
-                except ValueError:
-                    return jsonify({'error': 'Неверный формат даты'}), 400
-            
-            task.update(**update_data)
-            return jsonify({'message': 'Задача обновлена', 'task': task.to_dict()})
+            return respond(api.update_task(current_user, task_id, request.get_json(silent=True)))
+        else:
+            return respond(api.delete_task(current_user, task_id))
+    
+    @app.route('/api/admin/maintenance')
+    @login_required
+    def api_admin_maintenance():
+        """API: Состояние фонового обслуживания базы (для администраторов)"""
+        if not current_user.is_admin:
+            return jsonify({'error': 'Доступ запрещен'}), 403
+        
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify(app.extensions['maintenance'].status(limit=limit))
+    
+    @app.route('/api/admin/templates')
+    @login_required
+    def api_admin_templates():
+        """API: Время рендеринга шаблонов и кеш фрагментов этого процесса"""
+        if not current_user.is_admin:
+            return jsonify({'error': 'Доступ запрещен'}), 403
         
-        elif request.method == 'DELETE':
-            task.delete()
-            return jsonify({'message': 'Задача удалена'})
+        return jsonify(app.extensions['templating'].status())
     
     @app.route('/api/docs')
     def api_docs():
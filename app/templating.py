@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, before_render_template, template_rendered
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+
+class FragmentCache:
+    """LRU-кеш отрендеренных фрагментов шаблонов в памяти процесса.
+
+    Ключ задает шаблон: в него входит все, от чего зависит фрагмент
+    (например id задачи и номер ее изменения), поэтому устаревшие записи не
+    удаляются явно, а вытесняются как давно не использованные.
+    max_size = 0 отключает кеш.
+    """
+
+    def __init__(self, max_size=2000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if not self.max_size:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def status(self):
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+class FragmentCacheExtension(Extension):
+    """Тег {% cache часть_ключа, ... %}...{% endcache %}.
+
+    Тело блока рендерится только при промахе, иначе подставляется HTML
+    из environment.fragment_cache. Ключ - кортеж всех выражений тега.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache(0))
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        key = nodes.Tuple(parts, 'load')
+        return nodes.CallBlock(self.call_method('_cache', [key]), [], [], body).set_lineno(lineno)
+
+    def _cache(self, key, caller):
+        cache = self.environment.fragment_cache
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value)
+        return value
+
+
+class RenderStats:
+    """Время рендеринга шаблонов (render_template) в этом процессе"""
+
+    def __init__(self, fragment_cache, bytecode_dir=None):
+        self.fragment_cache = fragment_cache
+        self.bytecode_dir = bytecode_dir
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, ms):
+        with self._lock:
+            stats = self._templates.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+
+    def status(self):
+        """Состояние для административного эндпоинта"""
+        with self._lock:
+            templates = {
+                name: {
+                    'count': count,
+                    'avg_ms': round(total / count, 3),
+                    'max_ms': round(max_ms, 3),
+                    'total_ms': round(total, 1)
+                }
+                for name, (count, total, max_ms) in self._templates.items()
+            }
+        return {
+            'pid': os.getpid(),
+            'templates': templates,
+            'fragment_cache': self.fragment_cache.status(),
+            'bytecode_cache': self.bytecode_dir
+        }
+
+
+def init_templating(app):
+    """Кеш байткода Jinja, кеш фрагментов и замер времени рендеринга"""
+    env = app.jinja_env
+    env.add_extension(FragmentCacheExtension)
+    env.fragment_cache = FragmentCache(app.config['TEMPLATE_FRAGMENT_CACHE_SIZE'])
+
+    # Скомпилированные шаблоны сохраняются на диск: воркер после запуска
+    # или перезапуска (max_requests) не компилирует их заново. Jinja
+    # сверяет контрольную сумму исходника, измененный шаблон перекомпилируется
+    bytecode_dir = app.config['TEMPLATE_BYTECODE_CACHE_DIR']
+    if bytecode_dir:
+        os.makedirs(bytecode_dir, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+
+    stats = RenderStats(env.fragment_cache, bytecode_dir or None)
+    app.extensions['templating'] = stats
+
+    if app.config['TEMPLATE_TIMING']:
+        def render_started(sender, template, context, **extra):
+            g.setdefault('_render_started', []).append(time.perf_counter())
+
+        def render_finished(sender, template, context, **extra):
+            started = g.get('_render_started')
+            if not started:
+                return
+            ms = (time.perf_counter() - started.pop()) * 1000
+            stats.add(template.name, ms)
+            g.render_ms = g.get('render_ms', 0.0) + ms
+
+        before_render_template.connect(render_started, app, weak=False)
+        template_rendered.connect(render_finished, app, weak=False)
+
+        @app.after_request
+        def add_server_timing(response):
+            render_ms = g.get('render_ms')
+            if render_ms is not None:
+                response.headers.add('Server-Timing', f'render;dur={render_ms:.2f}')
+            return response
+
+    return stats
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""Точка входа ASGI для асинхронного API (/api/*).
+
+Запуск:
+    uvicorn asgi:app --host 0.0.0.0 --port 5001 --workers 2
+
+Остальные страницы обслуживает WSGI-приложение (wsgi.py); прокси
+направляет /api/ на этот сервер.
+"""
+from app import create_app
+from app.asgi import AsyncAPI
+
+app = AsyncAPI(create_app())
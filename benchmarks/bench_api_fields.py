@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Размер ответа и затраты CPU на 1000 задач для /api/tasks.
+
+Сравниваются прежний путь (SELECT *, объекты Task, to_dict) и выборка
+строк напрямую в JSON с разными наборами полей ?fields=.
+
+Запуск из корня проекта:
+    python benchmarks/bench_api_fields.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TASKS = 1000
+ROUNDS = 20
+
+
+def seed(db, count):
+    for i in range(count):
+        db.insert('tasks', {
+            'title': f'Задача {i}',
+            'description': 'Длинное описание задачи. ' * 40,
+            'status': ('new', 'in_progress', 'completed')[i % 3],
+            'priority': ('low', 'medium', 'high')[i % 3],
+            'due_date': '2030-01-%02d' % (i % 28 + 1),
+            'user_id': 1,
+        })
+
+
+def measure(func):
+    """CPU-время на 1000 задач (мс) и размер ответа на 1000 задач (байт)"""
+    body = func()
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        func()
+    cpu = (time.process_time() - start) / ROUNDS
+    return cpu * 1000, len(body)
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())
+    from flask import jsonify
+    from app import create_app
+    from app.database import db
+    from app.models import Task
+
+    seed(db, TASKS)
+    app = create_app()
+
+    def legacy():
+        # Прежняя реализация: все колонки, разбор дат, to_dict()
+        with app.test_request_context():
+            data = Task.get_all_tasks(per_page=TASKS)
+            return jsonify({
+                'tasks': [task.to_dict() for task in data['tasks']],
+                'total': data['total']
+            }).get_data()
+
+    def fast(fields):
+        def run():
+            with app.test_request_context():
+                return jsonify(Task.get_rows(Task.parse_fields(fields),
+                                             limit=TASKS)).get_data()
+        return run
+
+    assert legacy() == fast(None)(), 'ответы прежнего и нового пути различаются'
+
+    print(f'{TASKS} задач, среднее по {ROUNDS} прогонам')
+    print(f'{"вариант":<34} {"CPU, мс":>9} {"байт":>10}')
+    cases = [
+        ('to_dict (прежний)', legacy),
+        ('строки, все поля', fast(None)),
+        ('строки, id,title,status', fast('id,title,status')),
+        ('строки, id,status,due_date', fast('id,status,due_date')),
+    ]
+    for name, func in cases:
+        cpu, size = measure(func)
+        print(f'{name:<34} {cpu:9.1f} {size:10d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Одновременные long polling соединения: gunicorn (WSGI) против uvicorn (ASGI).
+
+N клиентов одновременно открывают GET /api/tasks/changes?timeout=T
+(изменений нет, поэтому каждый запрос ждет T секунд). Считается,
+сколько запросов завершилось за T + 3 секунды, и сколько памяти
+(RSS всех процессов сервера) добавило каждое соединение.
+
+Запуск из корня проекта:
+    python benchmarks/bench_async.py --connections 500 --timeout 5
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+from bench_server import ROOT
+
+
+def rss_kb(root_pid):
+    """Суммарный RSS процесса и его потомков (Linux /proc)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except OSError:
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS'))
+        except (OSError, StopIteration):
+            pass
+    return total
+
+
+def start(cmd, workdir, env, url):
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url)
+        except urllib.error.HTTPError:
+            return proc
+        except OSError:
+            time.sleep(0.1)
+            continue
+        return proc
+    raise RuntimeError('Сервер не запустился: ' + ' '.join(cmd))
+
+
+async def long_poll(host, port, path, cookie, deadline):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+                  f'Cookie: {cookie}\r\nConnection: close\r\n\r\n').encode())
+    await writer.drain()
+    try:
+        status = await asyncio.wait_for(reader.readline(), deadline - time.monotonic())
+        return b' 200 ' in status
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        writer.close()
+
+
+async def run_clients(port, cookie, connections, timeout, pid):
+    path = '/api/tasks/changes?' + urllib.parse.urlencode(
+        {'since': str(2 ** 62), 'timeout': timeout, 'fields': 'id'})
+    deadline = time.monotonic() + timeout + 3
+    before = rss_kb(pid)
+    tasks = [asyncio.create_task(long_poll('127.0.0.1', port, path, cookie, deadline))
+             for _ in range(connections)]
+    await asyncio.sleep(min(1.0, timeout / 2))
+    during = rss_kb(pid)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return sum(r is True for r in results), before, during
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--timeout', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=ROOT, TM_ACCESS_LOG='',
+               FLASK_RATELIMIT_ENABLED='false', FLASK_MAINTENANCE_ENABLED='false',
+               FLASK_SHED_DB_QUEUE_DEPTH='0', FLASK_SHED_DB_WAIT='0',
+               TM_WORKERS=str(args.workers), TM_THREADS=str(args.threads))
+    servers = [
+        (f'gunicorn {args.workers}x{args.threads}', 5081,
+         [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+          '-b', '127.0.0.1:5081', 'wsgi:app']),
+        ('uvicorn (asgi.py)', 5082,
+         [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', '5082',
+          '--log-level', 'warning', '--backlog', '4096']),
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        procs = [start(cmd, workdir, env, f'http://127.0.0.1:{port}/api/tasks')
+                 for _, port, cmd in servers]
+        try:
+            jar = http.cookiejar.CookieJar()
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+            opener.open('http://127.0.0.1:5081/login', urllib.parse.urlencode(
+                {'username': 'admin', 'password': 'admin123'}).encode()).read()
+            cookie = '; '.join(f'{c.name}={c.value}' for c in jar)
+
+            print(f'{args.connections} соединений, ожидание {args.timeout:.0f} с')
+            print(f'{"сервер":<20} {"успели":>8} {"RSS до, МБ":>11} {"RSS под нагрузкой":>18} {"КБ/соед.":>9}')
+            for (name, port, _), proc in zip(servers, procs):
+                done, before, during = asyncio.run(
+                    run_clients(port, cookie, args.connections, args.timeout, proc.pid))
+                per_conn = max(0, during - before) / args.connections
+                print(f'{name:<20} {done:>8} {before / 1024:11.1f} {during / 1024:18.1f} {per_conn:9.1f}')
+        finally:
+            for proc in procs:
+                # Оставшиеся в очереди long poll не дожидаемся
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Календарь и просроченные задачи: частичный индекс против полного просмотра.
+
+База из 20 000 задач двух пользователей, 70% завершены. Замеряются
+календарь пользователя на 7 дней, подсчет его просроченных задач, чтение
+готового числа из overdue_counts и полный пересчет overdue_scan - с
+частичными индексами по due_date и после их удаления.
+
+Запуск из корня проекта:
+    python benchmarks/bench_due_dates.py
+"""
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+N = 20000
+
+COUNT_SQL = ("SELECT COUNT(*) FROM tasks "
+             "WHERE user_id = ? AND status != 'completed' AND due_date < ?")
+
+
+def per_call_ms(func, number=200):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())
+    from app.database import db
+    from app.models import Task
+
+    random.seed(1)
+    today = date.today()
+    rows = []
+    for i in range(N):
+        due = today + timedelta(days=random.randint(-60, 60)) if random.random() < 0.8 else None
+        rows.append((f'Задача {i}', 'completed' if random.random() < 0.7 else 'new',
+                     due.isoformat() if due else None, 1 if i % 3 else 2))
+    with db.get_cursor() as cursor:
+        cursor.execute("INSERT INTO users (username, email, password_hash) VALUES ('u2', 'u2@example.com', 'x')")
+        cursor.executemany('INSERT INTO tasks (title, status, due_date, user_id) VALUES (?, ?, ?, ?)', rows)
+        cursor.execute('ANALYZE')
+
+    fields = ['id', 'title', 'status', 'priority', 'due_date']
+    week = today + timedelta(days=6)
+    cases = [
+        ('календарь на 7 дней', lambda: Task.get_due_rows(fields, today, week, user_id=1)),
+        ('число просроченных', lambda: db.fetch_one(COUNT_SQL, (1, today.isoformat()))),
+        ('overdue_scan', Task.scan_overdue),
+    ]
+
+    indexed = {name: per_call_ms(func) for name, func in cases}
+    cached = per_call_ms(lambda: Task.get_overdue_count(1))
+
+    with db.get_cursor() as cursor:
+        cursor.execute('DROP INDEX idx_tasks_due_open')
+        cursor.execute('DROP INDEX idx_tasks_user_due_open')
+    full = {name: per_call_ms(func) for name, func in cases}
+
+    print(f'{N} задач, мс/вызов')
+    print(f'  {"":<22}{"без индекса":>12}{"с индексом":>12}')
+    for name, _ in cases:
+        print(f'  {name:<22}{full[name]:12.2f}{indexed[name]:12.2f}')
+    print(f'  {"из overdue_counts":<22}{"":>12}{cached:12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Пропускная способность проверки паролей при разной стоимости KDF.
+
+Несколько клиентских потоков одновременно проверяют пароль через
+PasswordHasher (как при всплеске входов); считаются успешные проверки
+в секунду и отказы из-за переполненной очереди.
+
+Запуск из корня проекта:
+    python benchmarks/bench_passwords.py --clients 16 --workers 2
+"""
+import argparse
+import hashlib
+import os
+import secrets
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.passwords import PasswordHasher, PasswordHasherBusy  # noqa: E402
+
+SETTINGS = [
+    ('sha256 (прежний)', None),
+    ('pbkdf2_sha256 100k', dict(algorithm='pbkdf2_sha256', iterations=100000)),
+    ('pbkdf2_sha256 300k', dict(algorithm='pbkdf2_sha256', iterations=300000)),
+    ('pbkdf2_sha256 600k', dict(algorithm='pbkdf2_sha256', iterations=600000)),
+    ('scrypt n=2^14', dict(algorithm='scrypt', scrypt_n=2 ** 14)),
+    ('scrypt n=2^15', dict(algorithm='scrypt', scrypt_n=2 ** 15)),
+]
+
+
+def run(hasher, stored, clients, duration):
+    ok = []
+    busy = []
+    deadline = time.perf_counter() + duration
+
+    def client():
+        done = rejected = 0
+        while time.perf_counter() < deadline:
+            try:
+                hasher.verify('secret-password', stored)
+                done += 1
+            except PasswordHasherBusy:
+                rejected += 1
+                time.sleep(0.01)
+        ok.append(done)
+        busy.append(rejected)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(ok) / duration, sum(busy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f'{args.clients} клиентов, пул {args.workers}, очередь {args.queue}, {args.duration:.0f} с')
+    print(f'{"настройка":<22} {"входов/с":>9} {"мс/вход":>8} {"отказов":>8}')
+    for name, options in SETTINGS:
+        hasher = PasswordHasher(workers=args.workers, max_queue=args.queue,
+                                **(options or {}))
+        if options is None:
+            salt = secrets.token_hex(16)
+            stored = f"{salt}${hashlib.sha256(('secret-password' + salt).encode()).hexdigest()}"
+        else:
+            stored = hasher.hash('secret-password')
+        rate, rejected = run(hasher, stored, args.clients, args.duration)
+        print(f'{name:<22} {rate:9.1f} {1000 / rate if rate else 0:8.2f} {rejected:8d}')
+
+
+if __name__ == '__main__':
+    main()
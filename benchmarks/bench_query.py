@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Накладные расходы построения SQL и подготовки операторов.
+
+1. Сборка текста SQL: прежние f-строки против QueryBuilder с кешем форм.
+2. Выполнение UPDATE при cached_statements=0 (оператор готовится заново
+   при каждом вызове) и cached_statements=512.
+3. Страница списка задач: прежняя выборка всех строк со срезом в Python
+   против COUNT + LIMIT/OFFSET в SQL.
+
+Запуск из корня проекта:
+    python benchmarks/bench_query.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+N = 20000
+
+
+def legacy_update_sql(table, data, where):
+    set_clause = ', '.join([f'{key} = ?' for key in data.keys()])
+    where_clause = ' AND '.join([f'{key} = ?' for key in where.keys()])
+    return f'UPDATE {table} SET {set_clause} WHERE {where_clause}'
+
+
+def legacy_insert_sql(table, data):
+    columns = ', '.join(data.keys())
+    placeholders = ', '.join(['?' for _ in data])
+    return f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+
+
+def per_call_us(func, number=N):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())
+    from app.database import db
+    from app.models import Task
+
+    data = {'title': 'x', 'description': 'y', 'status': 'new', 'priority': 'low',
+            'due_date': None, 'updated_at': '2030-01-01 00:00:00'}
+    where = {'id': 1}
+
+    print('Сборка SQL, мкс/вызов')
+    print(f'  UPDATE  f-строки {per_call_us(lambda: legacy_update_sql("tasks", data, where)):6.2f}'
+          f'   QueryBuilder {per_call_us(lambda: db.queries.update("tasks", tuple(data), tuple(where))):6.2f}')
+    print(f'  INSERT  f-строки {per_call_us(lambda: legacy_insert_sql("tasks", data)):6.2f}'
+          f'   QueryBuilder {per_call_us(lambda: db.queries.insert("tasks", tuple(data))):6.2f}')
+
+    for i in range(5000):
+        db.insert('tasks', {'title': f'Задача {i}', 'description': 'Описание ' * 30,
+                            'status': 'new', 'user_id': 1})
+
+    print('Выполнение UPDATE по id, мкс/вызов')
+    sql = db.queries.update('tasks', tuple(data), tuple(where))
+    params = tuple(data.values()) + (1,)
+    for size in (0, 512):
+        conn = sqlite3.connect(db.db_path, cached_statements=size)
+        cursor = conn.cursor()
+        us = per_call_us(lambda: cursor.execute(sql, params), number=5000)
+        conn.rollback()
+        conn.close()
+        print(f'  cached_statements={size:<4} {us:8.2f}')
+
+    def legacy_page():
+        rows = db.fetch_all('SELECT * FROM tasks WHERE 1=1 ORDER BY created_at DESC')
+        return [Task(**row) for row in rows[18:27]]
+
+    print('Страница списка задач (5000 задач, 9 на странице), мкс/вызов')
+    print(f'  все строки + срез {per_call_us(legacy_page, number=20):10.1f}')
+    print(f'  COUNT + LIMIT     {per_call_us(lambda: Task.get_all_tasks(page=3, per_page=9), number=20):10.1f}')
+
+
+if __name__ == '__main__':
+    main()
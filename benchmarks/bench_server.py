@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Сравнение пропускной способности dev-сервера и gunicorn.
+
+Скрипт поднимает сервер во временном каталоге (со своей базой),
+входит под администратором, создает тестовые задачи и нагружает
+маршруты приложения из нескольких потоков.
+
+Запуск из корня проекта:
+    python benchmarks/bench_server.py --server dev
+    python benchmarks/bench_server.py --server gunicorn --workers 4 --threads 4
+"""
+import argparse
+import http.cookiejar
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ['/api/tasks', '/tasks', '/api/task/1']
+
+
+def make_opener():
+    """HTTP-клиент с собственными cookie (сессией Flask-Login)"""
+    jar = http.cookiejar.CookieJar()
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+
+def login(base_url, username='admin', password='admin123'):
+    opener = make_opener()
+    data = urllib.parse.urlencode({'username': username, 'password': password}).encode()
+    opener.open(base_url + '/login', data).read()
+    return opener
+
+
+def seed_tasks(opener, base_url, count):
+    """Создание задач через веб-форму"""
+    for i in range(count):
+        data = urllib.parse.urlencode({
+            'title': f'Задача {i}',
+            'description': 'Описание задачи ' * 20,
+            'status': ('new', 'in_progress', 'completed')[i % 3],
+            'priority': ('low', 'medium', 'high')[i % 3],
+            'due_date': '2030-01-%02d' % (i % 28 + 1),
+        }).encode()
+        opener.open(base_url + '/task/new', data).read()
+
+
+def start_server(kind, port, workdir, workers, threads):
+    # Лимиты частоты запросов отключены: измеряется сам сервер
+    env = dict(os.environ, PYTHONPATH=ROOT, TM_ACCESS_LOG='',
+               FLASK_RATELIMIT_ENABLED='false', FLASK_MAINTENANCE_ENABLED='false')
+    if kind == 'dev':
+        cmd = [sys.executable, '-c',
+               'from app import create_app; '
+               f'create_app().run(debug=True, port={port}, use_reloader=False)']
+    else:
+        env.update(TM_BIND=f'127.0.0.1:{port}', TM_WORKERS=str(workers),
+                   TM_THREADS=str(threads))
+        cmd = [sys.executable, '-m', 'gunicorn',
+               '-c', os.path.join(ROOT, 'gunicorn.conf.py'), 'wsgi:app']
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(base_url + '/login').read()
+            return proc, base_url
+        except OSError:
+            time.sleep(0.1)
+    stop_server(proc)
+    raise RuntimeError('Сервер не запустился')
+
+
+def stop_server(proc):
+    os.killpg(proc.pid, signal.SIGTERM)
+    proc.wait(timeout=30)
+
+
+def run_load(base_url, path, clients, duration):
+    """Нагрузка одного маршрута: возвращает (запросов в секунду, p50, p99)"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        opener = login(base_url)
+        local = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                opener.open(base_url + path).read()
+            except OSError:
+                failed += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    pool = [threading.Thread(target=client) for _ in range(clients)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    latencies.sort()
+    rps = len(latencies) / duration
+    p50 = statistics.median(latencies) * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    return rps, p50, p99, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=['dev', 'gunicorn'], default='dev')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--port', type=int, default=5077)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        proc, base_url = start_server(args.server, args.port, workdir,
+                                      args.workers, args.threads)
+        try:
+            seed_tasks(login(base_url), base_url, args.tasks)
+            print(f'{args.server}: {args.clients} клиентов, {args.duration:.0f} с')
+            for path in PATHS:
+                rps, p50, p99, errors = run_load(base_url, path, args.clients,
+                                                 args.duration)
+                print(f'  {path:<14} {rps:8.1f} req/s  p50 {p50:7.1f} мс  '
+                      f'p99 {p99:7.1f} мс  ошибок {errors}')
+        finally:
+            stop_server(proc)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Кеш байткода Jinja и кеш карточек задач.
+
+1. Холодный старт: загрузка всех шаблонов в новом Environment (как в
+   только что запущенном воркере) с компиляцией и из кеша байткода.
+2. Рендеринг /tasks (9 карточек) и /admin/tasks (12 карточек, автор
+   каждой задачи - отдельный запрос) без кеша фрагментов и с прогретым
+   кешем. Время берется из заголовка Server-Timing.
+
+Запуск из корня проекта:
+    python benchmarks/bench_templates.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEMPLATES = os.path.join(ROOT, 'app', 'templates')
+
+
+def cold_start_ms(bytecode_cache, repeat=20):
+    from jinja2 import Environment, FileSystemLoader
+    from app.templating import FragmentCacheExtension
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        env = Environment(loader=FileSystemLoader(TEMPLATES), autoescape=True,
+                          extensions=[FragmentCacheExtension], bytecode_cache=bytecode_cache)
+        for name in env.list_templates():
+            env.get_template(name)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def render_ms(client, path, repeat=200):
+    times = []
+    for _ in range(repeat):
+        response = client.get(path)
+        times.append(float(response.headers['Server-Timing'].split('dur=')[1]))
+    return statistics.median(times)
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    os.environ['FLASK_RATELIMIT_ENABLED'] = 'false'
+    os.environ['FLASK_MAINTENANCE_ENABLED'] = 'false'
+    os.environ['FLASK_TEMPLATE_BYTECODE_CACHE_DIR'] = os.path.join(workdir, 'jinja_cache')
+
+    from jinja2 import FileSystemBytecodeCache
+    from app import create_app
+    from app.models import Task
+
+    os.makedirs(os.path.join(workdir, 'bench_cache'))
+    bytecode = FileSystemBytecodeCache(os.path.join(workdir, 'bench_cache'))
+    cold_start_ms(bytecode, repeat=1)  # заполнение кеша
+    print('Загрузка всех шаблонов в новом процессе, мс')
+    print(f'  компиляция      {cold_start_ms(None):8.2f}')
+    print(f'  кеш байткода    {cold_start_ms(bytecode):8.2f}')
+
+    app = create_app()
+    for i in range(30):
+        Task.create(f'Задача {i}', 'Описание задачи ' * 60, ('new', 'in_progress', 'completed')[i % 3],
+                    ('low', 'medium', 'high')[i % 3], date.today() + timedelta(days=i - 10), 1)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    cache = app.jinja_env.fragment_cache
+    size = cache.max_size
+
+    print('Рендеринг страницы, мс (медиана Server-Timing)')
+    for path in ('/tasks', '/admin/tasks'):
+        cache.max_size = 0
+        cache.clear()
+        uncached = render_ms(client, path)
+        cache.max_size = size
+        warm = render_ms(client, path)
+        print(f'  {path:<14} без кеша {uncached:6.2f}   кеш карточек {warm:6.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Конфигурация gunicorn для производственного запуска.
+
+Все параметры можно переопределить переменными окружения:
+
+    TM_BIND               адрес и порт (по умолчанию 0.0.0.0:5000)
+    TM_WORKERS            число рабочих процессов (по умолчанию 2 * CPU + 1)
+    TM_THREADS            число потоков в каждом воркере (по умолчанию 4)
+    TM_MAX_REQUESTS       перезапуск воркера после N запросов (0 - отключить)
+    TM_MAX_REQUESTS_JITTER  случайный разброс для max_requests
+    TM_TIMEOUT            таймаут зависшего воркера, секунды
+    TM_GRACEFUL_TIMEOUT   время на завершение текущих запросов при остановке
+    TM_ACCESS_LOG         файл журнала запросов ('-' - stdout, пусто - отключить)
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+bind = os.environ.get('TM_BIND', '0.0.0.0:5000')
+
+# Воркеры с потоками (gthread): процессы дают параллелизм по CPU,
+# потоки - ожидание SQLite без простоя процесса
+workers = _env_int('TM_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+threads = _env_int('TM_THREADS', 4)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Приложение загружается один раз в мастере до fork(): схема базы создается
+# однократно, а код и шаблоны разделяются между воркерами copy-on-write
+preload_app = True
+
+# Перезапуск воркеров для ограничения роста памяти; разброс не дает
+# всем воркерам перезапуститься одновременно
+max_requests = _env_int('TM_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('TM_MAX_REQUESTS_JITTER', 100)
+
+timeout = _env_int('TM_TIMEOUT', 30)
+graceful_timeout = _env_int('TM_GRACEFUL_TIMEOUT', 30)
+keepalive = 5
+
+accesslog = os.environ.get('TM_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+
+def pre_fork(server, worker):
+    """Мастер закрывает соединение с базой (открытое при preload_app) до fork()"""
+    from app.database import db
+    db.close()
+
+
+def post_fork(server, worker):
+    """Каждый воркер открывает собственные соединения с базой"""
+    from app.database import db
+    db.after_fork()
+
+
+def worker_exit(server, worker):
+    """Остановка фонового обслуживания и закрытие соединения с базой"""
+    app = getattr(worker, 'wsgi', None)
+    scheduler = getattr(app, 'extensions', {}).get('maintenance')
+    if scheduler:
+        scheduler.stop()
+    
+    from app.database import db
+    db.close()
@@ -0,0 +1,75 @@
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# База (task_manager.db) создается в текущем каталоге при импорте
+# app.database, поэтому тесты работают во временном каталоге
+WORKDIR = tempfile.mkdtemp(prefix='task_manager_tests_')
+os.chdir(WORKDIR)
+
+os.environ['FLASK_MAINTENANCE_ENABLED'] = 'false'
+os.environ['FLASK_RATELIMIT_ENABLED'] = 'false'
+os.environ['FLASK_PASSWORD_PBKDF2_ITERATIONS'] = '1000'
+os.environ['FLASK_TEMPLATE_BYTECODE_CACHE_DIR'] = os.path.join(WORKDIR, 'jinja_cache')
+
+from app import create_app  # noqa: E402
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture
+def app():
+    """Новое приложение на каждый тест: свои счетчики rate limit и кеш фрагментов"""
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture(autouse=True)
+def _push_request_context():
+    """Отключает контекст запроса, который pytest-flask держит на весь тест.
+
+    Иначе все запросы тестового клиента делят один g: Flask-Login берет
+    пользователя из g._login_user прошлого запроса, а g.render_ms
+    накапливается между запросами.
+    """
+    yield
+
+
+@pytest.fixture
+def make_user(app):
+    """Создание пользователя с уникальным именем (пароль password123)"""
+    from app.auth import User
+
+    def make_user(is_admin=False):
+        number = next(_user_numbers)
+        return User.create(f'user{number}', f'user{number}@example.com', 'password123', is_admin)
+
+    return make_user
+
+
+@pytest.fixture
+def user(make_user):
+    """Отдельный пользователь для теста, чтобы задачи тестов не пересекались"""
+    return make_user()
+
+
+@pytest.fixture
+def user_client(client, user):
+    """Клиент, вошедший как user"""
+    response = client.post('/login', data={'username': user.username, 'password': 'password123'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def make_task(user):
+    """Создание задачи пользователя user"""
+    from app.models import Task
+
+    def make_task(title='Задача', status='new', priority='medium', due_date=None):
+        return Task.create(title, 'Описание', status, priority, due_date, user.id)
+
+    return make_task
@@ -0,0 +1,56 @@
+from app.models import Task
+
+
+def test_unknown_fields_are_rejected(user_client):
+    response = user_client.get('/api/tasks?fields=id,password,secret')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Неизвестные поля: password, secret'
+
+
+def test_fields_limit_keys_in_list(user_client, make_task):
+    make_task('Первая')
+
+    response = user_client.get('/api/tasks?fields=title, id')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total'] == 1
+    assert data['tasks'] == [{'id': data['tasks'][0]['id'], 'title': 'Первая'}]
+
+
+def test_all_fields_by_default(user_client, make_task):
+    make_task()
+
+    task = user_client.get('/api/tasks').get_json()['tasks'][0]
+
+    assert set(task) == set(Task.API_FIELDS)
+
+
+def test_fields_for_single_task(user_client, make_task):
+    task = make_task('Одна')
+
+    response = user_client.get(f'/api/task/{task.id}?fields=title')
+
+    assert response.status_code == 200
+    # user_id читается для проверки прав, но в ответ не попадает
+    assert response.get_json() == {'task': {'title': 'Одна'}}
+
+
+def test_unknown_fields_for_single_task(user_client, make_task):
+    task = make_task()
+
+    response = user_client.get(f'/api/task/{task.id}?fields=owner')
+
+    assert response.status_code == 400
+
+
+def test_fields_do_not_bypass_access_check(app, user_client):
+    from app.auth import User
+
+    other = User.create('stranger', 'stranger@example.com', 'password123')
+    task = Task.create('Чужая', '', 'new', 'low', None, other.id)
+
+    response = user_client.get(f'/api/task/{task.id}?fields=title')
+
+    assert response.status_code == 403
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+import pytest
+
+from app.asgi import AsyncAPI
+from app.models import Task
+
+
+@pytest.fixture
+def asgi(app):
+    asgi = AsyncAPI(app)
+    yield asgi
+    asgi.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def cookie(app, user_client):
+    """Cookie сессии пользователя, вошедшего через Flask-приложение"""
+    name = app.config['SESSION_COOKIE_NAME']
+    return f'{name}={user_client.get_cookie(name).value}'
+
+
+async def request(asgi, method, path, cookie=None, body=None, **query):
+    """Один запрос к ASGI-приложению: (статус, заголовки, JSON)"""
+    headers = [(b'cookie', cookie.encode())] if cookie else []
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': urlencode(query).encode(), 'headers': headers}
+    received = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        received.append(message)
+
+    await asgi(scope, receive, send)
+    start, response = received
+    return (start['status'], {k.decode(): v.decode() for k, v in start['headers']},
+            json.loads(response['body']))
+
+
+def call(asgi, method, path, cookie=None, body=None, **query):
+    return asyncio.run(request(asgi, method, path, cookie, body, **query))
+
+
+def test_requires_session(asgi):
+    status, _, body = call(asgi, 'GET', '/api/tasks')
+
+    assert status == 401
+    assert body == {'error': 'Требуется вход'}
+
+
+def test_forged_session_is_rejected(app, asgi):
+    name = app.config['SESSION_COOKIE_NAME']
+
+    assert call(asgi, 'GET', '/api/tasks', cookie=f'{name}=forged')[0] == 401
+
+
+def test_unknown_path_and_method(asgi, cookie):
+    assert call(asgi, 'GET', '/api/unknown', cookie)[0] == 404
+    assert call(asgi, 'POST', '/api/tasks', cookie)[0] == 405
+
+
+def test_same_responses_as_flask(asgi, cookie, user_client, make_task):
+    task = make_task('Общая')
+
+    for path, query in [('/api/tasks', {'fields': 'id,title'}),
+                        ('/api/tasks', {'fields': 'nope'}),
+                        (f'/api/task/{task.id}', {'fields': 'title,status'}),
+                        ('/api/tasks/overdue', {}),
+                        ('/api/tasks/calendar', {'from': 'bad'})]:
+        flask_response = user_client.get(path, query_string=query)
+        status, _, body = call(asgi, 'GET', path, cookie, **query)
+        assert (status, body) == (flask_response.status_code, flask_response.get_json()), path
+
+
+def test_put_and_delete(asgi, cookie, make_task):
+    task = make_task('До правки')
+
+    status, _, body = call(asgi, 'PUT', f'/api/task/{task.id}', cookie,
+                           body={'title': 'После правки', 'due_date': '2030-01-02'})
+    assert status == 200
+    assert body['task']['title'] == 'После правки'
+    assert Task.get(task.id).title == 'После правки'
+
+    status, _, body = call(asgi, 'PUT', f'/api/task/{task.id}', cookie, body={'due_date': '02.01.2030'})
+    assert (status, body) == (400, {'error': 'Неверный формат даты'})
+
+    assert call(asgi, 'DELETE', f'/api/task/{task.id}', cookie)[0] == 200
+    assert Task.get(task.id) is None
+    assert call(asgi, 'DELETE', f'/api/task/{task.id}', cookie)[0] == 404
+
+
+def test_foreign_task_is_forbidden(asgi, cookie):
+    from app.auth import User
+
+    other = User.create('async_other', 'async_other@example.com', 'password123')
+    task = Task.create('Чужая', '', 'new', 'low', None, other.id)
+
+    assert call(asgi, 'GET', f'/api/task/{task.id}', cookie)[0] == 403
+    assert call(asgi, 'PUT', f'/api/task/{task.id}', cookie, body={'title': 'x'})[0] == 403
+    assert call(asgi, 'DELETE', f'/api/task/{task.id}', cookie)[0] == 403
+    assert Task.get(task.id).title == 'Чужая'
+
+
+def test_rate_limit(app, asgi, cookie):
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_GROUPS']['api'].update(rate=0.1, burst=1)
+
+    assert call(asgi, 'GET', '/api/tasks', cookie)[0] == 200
+    status, headers, body = call(asgi, 'GET', '/api/tasks', cookie)
+
+    assert status == 429
+    assert body == {'error': 'Слишком много запросов'}
+    assert 1 <= int(headers['retry-after']) <= 10
+
+
+def test_sheds_load_when_pool_queue_is_full(app, asgi, cookie):
+    app.config['SHED_DB_QUEUE_DEPTH'] = 4
+    asgi.pending = 4
+
+    status, headers, _ = call(asgi, 'GET', '/api/tasks', cookie)
+
+    assert status == 503
+    assert headers['retry-after'] == '1'
+
+
+@pytest.mark.parametrize('timeout', ['nan', 'inf'])
+def test_long_poll_rejects_infinite_timeout(asgi, cookie, timeout):
+    status, _, body = call(asgi, 'GET', '/api/tasks/changes', cookie, since=0, timeout=timeout)
+
+    assert (status, body) == (400, {'error': 'Неверное значение timeout'})
+
+
+def test_long_poll_wakes_up_on_change(app, asgi, cookie, make_task):
+    app.config['API_POLL_INTERVAL'] = 0.05
+    task = make_task('До правки')
+    cursor = call(asgi, 'GET', '/api/tasks/changes', cookie)[2]['cursor']
+
+    async def scenario():
+        poll = asyncio.ensure_future(request(asgi, 'GET', '/api/tasks/changes', cookie,
+                                             since=cursor, timeout=5, fields='id,title'))
+        await asyncio.sleep(0.2)
+        assert not poll.done()
+        await request(asgi, 'PUT', f'/api/task/{task.id}', cookie, body={'title': 'После правки'})
+        return await asyncio.wait_for(poll, 2)
+
+    status, _, body = asyncio.run(scenario())
+
+    assert status == 200
+    assert body['tasks'] == [{'id': task.id, 'title': 'После правки'}]
+    assert body['cursor'] > cursor
+
+
+def test_long_poll_timeout(app, asgi, cookie):
+    app.config['API_POLL_INTERVAL'] = 0.05
+    cursor = call(asgi, 'GET', '/api/tasks/changes', cookie)[2]['cursor']
+    started = time.monotonic()
+
+    status, _, body = call(asgi, 'GET', '/api/tasks/changes', cookie, since=cursor, timeout=0.2)
+
+    assert (status, body) == (200, {'tasks': [], 'cursor': cursor})
+    assert 0.2 <= time.monotonic() - started < 1
@@ -0,0 +1,64 @@
+import gzip
+import os
+
+import pytest
+
+from app import assets
+from app.assets import AssetManifest
+
+CSS = 'body { color: red; }\n' * 100
+
+
+@pytest.fixture
+def static(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'app.css').write_text(CSS)
+    return tmp_path
+
+
+def test_precompressed_variants(static):
+    manifest = AssetManifest(str(static)).build()
+
+    assert 'gzip' in manifest.encodings['css/app.css']
+    assert gzip.decompress((static / 'css' / 'app.css.gz').read_bytes()).decode() == CSS
+    assert list(manifest.hashed) == ['css/app.css']
+    assert sorted(os.listdir(static / 'css')) == sorted(['app.css'] + [
+        'app.css' + assets.SUFFIXES[e] for e in manifest.encodings['css/app.css']
+    ])
+
+
+def test_stale_variant_is_replaced_not_truncated(static):
+    source = static / 'css' / 'app.css'
+    AssetManifest(str(static)).build()
+    reader = open(static / 'css' / 'app.css.gz', 'rb')
+
+    source.write_text(CSS.replace('red', 'blue'))
+    stat = os.stat(static / 'css' / 'app.css.gz')
+    os.utime(source, (stat.st_mtime + 10, stat.st_mtime + 10))
+    AssetManifest(str(static)).build()
+
+    # Процесс, открывший старый файл, дочитывает его целиком
+    with reader:
+        assert gzip.decompress(reader.read()).decode() == CSS
+    assert 'blue' in gzip.decompress((static / 'css' / 'app.css.gz').read_bytes()).decode()
+
+
+def test_failed_write_leaves_no_files(static, monkeypatch):
+    def fail(data, encoding, level):
+        raise OSError('диск заполнен')
+
+    monkeypatch.setattr(assets, 'compress', fail)
+
+    manifest = AssetManifest(str(static)).build()
+
+    assert manifest.encodings['css/app.css'] == []
+    assert os.listdir(static / 'css') == ['app.css']
+
+
+def test_temporary_files_are_not_assets(static):
+    # Временный файл другого процесса, еще не переименованный
+    (static / 'css' / '.app.css.gz.x1y2z3.gz').write_bytes(b'partial')
+
+    manifest = AssetManifest(str(static)).build()
+
+    assert list(manifest.hashed) == ['css/app.css']
@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.database import db
+from app.models import Task
+
+TODAY = date.today()
+
+
+def day(offset):
+    return TODAY + timedelta(days=offset)
+
+
+def overdue_count(user):
+    return Task.get_overdue_count(user.id)
+
+
+@pytest.fixture
+def admin_client(app, make_user):
+    admin = make_user(is_admin=True)
+    client = app.test_client()
+    client.post('/login', data={'username': admin.username, 'password': 'password123'})
+    return client
+
+
+@pytest.fixture
+def other_task(make_user):
+    """Просроченная задача другого пользователя"""
+    return Task.create('Чужая', '', 'new', 'low', day(-1), make_user().id)
+
+
+def test_default_window_is_default_days_inclusive():
+    start, end = Task.parse_due_range(None, None, default_days=7)
+
+    assert start == TODAY
+    assert end == day(6)
+
+
+def test_window_from_start_date():
+    assert Task.parse_due_range('2030-01-10', None, default_days=3) == (date(2030, 1, 10), date(2030, 1, 12))
+
+
+@pytest.mark.parametrize('date_from, date_to, error', [
+    ('2030-13-01', None, 'Неверный формат даты, ожидается ГГГГ-ММ-ДД'),
+    ('01.01.2030', None, 'Неверный формат даты, ожидается ГГГГ-ММ-ДД'),
+    ('2030-01-10', '2030-01-09', 'Дата to раньше даты from'),
+    ('2030-01-01', '2030-01-11', 'Интервал больше 10 дней'),
+])
+def test_invalid_range(date_from, date_to, error):
+    with pytest.raises(ValueError, match=error):
+        Task.parse_due_range(date_from, date_to, max_days=10)
+
+
+def test_max_days_counts_both_ends():
+    assert Task.parse_due_range('2030-01-01', '2030-01-10', max_days=10) == (date(2030, 1, 1), date(2030, 1, 10))
+    assert Task.parse_due_range('2030-01-01', '2030-01-01', max_days=1) == (date(2030, 1, 1), date(2030, 1, 1))
+
+
+def test_calendar_api(app, user_client, make_task):
+    inside = [make_task('Сегодня', due_date=day(0)).id, make_task('Последний день', due_date=day(6)).id]
+    make_task('После окна', due_date=day(7))
+    make_task('Вчера', due_date=day(-1))
+    make_task('Завершенная', status='completed', due_date=day(1))
+    make_task('Без срока')
+
+    response = user_client.get('/api/tasks/calendar', query_string={'fields': 'id'})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [task['id'] for task in data['tasks']] == inside
+    assert data['total'] == 2
+    assert (data['from'], data['to']) == (day(0).isoformat(), day(6).isoformat())
+
+
+@pytest.mark.parametrize('query, error', [
+    ({'from': 'вчера'}, 'Неверный формат даты, ожидается ГГГГ-ММ-ДД'),
+    ({'from': '2030-01-10', 'to': '2030-01-01'}, 'Дата to раньше даты from'),
+    ({'from': '2030-01-01', 'to': '2031-01-02'}, 'Интервал больше 366 дней'),
+    ({'fields': 'id,secret'}, 'Неизвестные поля: secret'),
+])
+def test_calendar_api_errors(user_client, query, error):
+    response = user_client.get('/api/tasks/calendar', query_string=query)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_user_sees_only_own_tasks(user_client, make_task, other_task):
+    own = make_task('Своя', due_date=day(-2))
+    query = {'from': day(-3).isoformat(), 'to': day(0).isoformat(), 'fields': 'id'}
+
+    calendar = user_client.get('/api/tasks/calendar', query_string=query).get_json()
+    overdue = user_client.get('/api/tasks/overdue', query_string={'fields': 'id'}).get_json()
+
+    assert calendar['tasks'] == [{'id': own.id}]
+    assert overdue['tasks'] == [{'id': own.id}]
+
+
+def test_admin_sees_all_tasks(admin_client, make_task, other_task):
+    own = make_task('Пользователя', due_date=day(-2))
+
+    overdue = admin_client.get('/api/tasks/overdue', query_string={'fields': 'id'}).get_json()
+
+    ids = [task['id'] for task in overdue['tasks']]
+    assert own.id in ids and other_task.id in ids
+
+
+def test_overdue_api_excludes_today_and_completed(user_client, make_task):
+    late = make_task('Просрочена', due_date=day(-1))
+    make_task('Сегодня', due_date=day(0))
+    make_task('Завершена', status='completed', due_date=day(-5))
+
+    overdue = user_client.get('/api/tasks/overdue', query_string={'fields': 'id'}).get_json()
+
+    assert overdue == {'tasks': [{'id': late.id}], 'total': 1}
+
+
+def test_overdue_counts_follow_task_changes(user, make_task):
+    assert overdue_count(user) == 0
+
+    task = make_task('Просрочена', due_date=day(-1))
+    make_task('Будущая', due_date=day(1))
+    assert overdue_count(user) == 1
+
+    task.update(status='completed')
+    assert overdue_count(user) == 0
+
+    task.update(status='in_progress')
+    assert overdue_count(user) == 1
+
+    task.update(due_date=day(3))
+    assert overdue_count(user) == 0
+
+    task.update(due_date=day(-3))
+    assert overdue_count(user) == 1
+
+    Task.get(task.id).delete()
+    assert overdue_count(user) == 0
+
+
+def test_scan_overdue_matches_tasks(user, make_task, other_task):
+    make_task('Первая', due_date=day(-1))
+    make_task('Вторая', due_date=day(-10))
+    # Задача стала просроченной без изменений через модель (например,
+    # сменилась дата) - ее находит только полный пересчет
+    db.execute_query("INSERT INTO tasks (title, due_date, user_id) VALUES ('Третья', ?, ?)",
+                     (day(-2).isoformat(), user.id))
+    assert overdue_count(user) == 2
+
+    users, tasks = Task.scan_overdue()
+
+    expected = db.fetch_one("SELECT COUNT(*) AS n FROM tasks WHERE status != 'completed' "
+                            "AND due_date < ?", (TODAY.isoformat(),))['n']
+    assert tasks == expected
+    assert users >= 2
+    assert overdue_count(user) == 3
+    assert Task.get_overdue_count() == expected
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from app.models import Task
+
+
+def poll(client, **params):
+    response = client.get('/api/tasks/changes', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+@pytest.mark.parametrize('timeout', ['nan', 'inf', '-inf', 'abc'])
+def test_invalid_timeout_is_rejected(user_client, timeout):
+    started = time.monotonic()
+
+    response = user_client.get('/api/tasks/changes', query_string={'since': 0, 'timeout': timeout})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Неверное значение timeout'}
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize('since', ['abc', '-1', '1.5'])
+def test_invalid_cursor_is_rejected(user_client, since):
+    response = user_client.get('/api/tasks/changes', query_string={'since': since})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Неверное значение since'}
+
+
+def test_without_cursor_returns_immediately(user_client, make_task):
+    task = make_task('Первая')
+
+    changes = poll(user_client, timeout=5, fields='id,title')
+
+    assert changes['tasks'] == [{'id': task.id, 'title': 'Первая'}]
+    assert changes['cursor'] > 0
+
+
+def test_timeout_returns_empty_page_with_same_cursor(app, user_client, make_task):
+    app.config['API_POLL_INTERVAL'] = 0.05
+    make_task()
+    cursor = poll(user_client)['cursor']
+    started = time.monotonic()
+
+    changes = poll(user_client, since=cursor, timeout=0.2)
+
+    elapsed = time.monotonic() - started
+    assert changes == {'tasks': [], 'cursor': cursor}
+    assert 0.2 <= elapsed < 1
+
+
+def test_timeout_is_capped(app, user_client):
+    app.config['API_LONG_POLL_MAX'] = 0.1
+    app.config['API_POLL_INTERVAL'] = 0.05
+    cursor = poll(user_client)['cursor']
+    started = time.monotonic()
+
+    poll(user_client, since=cursor, timeout=30)
+
+    assert time.monotonic() - started < 1
+
+
+def test_paging_returns_every_change_once(user_client, make_task):
+    created = {make_task(f'Задача {i}').id for i in range(250)}
+
+    seen = []
+    cursor = 0
+    while True:
+        changes = poll(user_client, since=cursor, fields='id')
+        if not changes['tasks']:
+            break
+        assert len(changes['tasks']) <= 100
+        seen.extend(task['id'] for task in changes['tasks'])
+        cursor = changes['cursor']
+
+    assert sorted(seen) == sorted(created)
+
+
+def test_updates_in_same_second_are_not_lost(user_client, make_task):
+    task = make_task('Исходная')
+    cursor = poll(user_client)['cursor']
+
+    user_client.put(f'/api/task/{task.id}', json={'title': 'Первая правка'})
+    changes = poll(user_client, since=cursor, fields='id,title')
+    assert changes['tasks'] == [{'id': task.id, 'title': 'Первая правка'}]
+
+    # updated_at хранится с точностью до секунды, курсор от нее не зависит
+    user_client.put(f'/api/task/{task.id}', json={'title': 'Вторая правка'})
+    changes = poll(user_client, since=changes['cursor'], fields='id,title')
+    assert changes['tasks'] == [{'id': task.id, 'title': 'Вторая правка'}]
+
+
+def test_changed_task_moves_to_end_of_feed(user_client, make_task):
+    first = make_task('Первая')
+    second = make_task('Вторая')
+    cursor = poll(user_client)['cursor']
+
+    Task.get(first.id).update(status='completed')
+
+    changes = poll(user_client, since=cursor, fields='id,status')
+    assert changes['tasks'] == [{'id': first.id, 'status': 'completed'}]
+    assert second.id not in [task['id'] for task in poll(user_client, since=changes['cursor'])['tasks']]
+
+
+def test_feed_is_limited_to_own_tasks(user_client, make_task):
+    from app.auth import User
+
+    cursor = poll(user_client)['cursor']
+    other = User.create('neighbour', 'neighbour@example.com', 'password123')
+    Task.create('Чужая', '', 'new', 'low', None, other.id)
+    own = make_task('Своя')
+
+    changes = poll(user_client, since=cursor, fields='id,title')
+
+    assert changes['tasks'] == [{'id': own.id, 'title': 'Своя'}]
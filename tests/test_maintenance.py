@@ -0,0 +1,84 @@
+import pytest
+
+from app import maintenance
+from app.database import db
+from app.maintenance import MaintenanceScheduler
+
+
+class FakeClock:
+    """Замена модуля time в app.maintenance: время идет только по advance/sleep"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def __getattr__(self, name):
+        import time
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(maintenance, 'time', clock)
+    db.execute_query('DELETE FROM maintenance_jobs')
+    db.execute_query('DELETE FROM maintenance_log')
+    db.execute_query('UPDATE maintenance_lock SET owner = NULL, expires_at = 0')
+    return clock
+
+
+def run_for(scheduler, clock, seconds):
+    """Все тики scheduler.tick за seconds секунд; возвращает запуски по задачам"""
+    runs = {}
+    for _ in range(int(seconds // scheduler.tick)):
+        for job in scheduler.run_pending():
+            runs.setdefault(job, []).append(clock.time())
+        clock.advance(scheduler.tick)
+    return runs
+
+
+def test_rare_job_survives_log_trimming(clock):
+    scheduler = MaintenanceScheduler(db, tick=30, jobs={
+        'wal_checkpoint': 30, 'overdue_scan': 30, 'analyze': 3000
+    })
+    # Частые задачи вытесняют запись analyze из журнала за несколько тиков
+    scheduler.LOG_KEEP = 10
+
+    runs = run_for(scheduler, clock, 6000)
+
+    start = runs['wal_checkpoint'][0]
+    assert [t - start for t in runs['analyze']] == [0, 3000]
+    assert len(runs['wal_checkpoint']) == 200
+    assert db.fetch_one('SELECT COUNT(*) AS n FROM maintenance_log')['n'] <= 12
+
+
+def test_job_interval_is_kept_across_schedulers(clock):
+    jobs = {'optimize': 3600}
+    assert MaintenanceScheduler(db, jobs=jobs).run_pending() == ['optimize']
+
+    clock.advance(1800)
+    # Новый процесс-лидер продолжает то же расписание
+    assert MaintenanceScheduler(db, jobs=jobs).run_pending() == []
+
+    clock.advance(1800)
+    assert MaintenanceScheduler(db, jobs=jobs).run_pending() == ['optimize']
+
+
+def test_failed_job_is_retried_on_next_tick(clock):
+    scheduler = MaintenanceScheduler(db, jobs={'optimize': 3600})
+    scheduler._job_optimize = lambda: 1 / 0
+
+    with pytest.raises(ZeroDivisionError):
+        scheduler.run_pending()
+    del scheduler._job_optimize
+    clock.advance(30)
+
+    assert scheduler.run_pending() == ['optimize']
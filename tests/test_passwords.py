@@ -0,0 +1,146 @@
+import hashlib
+import threading
+
+import pytest
+
+from app.auth import User
+from app.database import db
+from app.passwords import PasswordHasher, PasswordHasherBusy, hasher
+
+
+def stored_hash(user):
+    return db.fetch_one('SELECT password_hash FROM users WHERE id = ?', (user.id,))['password_hash']
+
+
+def set_legacy_hash(user, password):
+    salt = 'a' * 32
+    legacy = f'{salt}${hashlib.sha256((password + salt).encode()).hexdigest()}'
+    db.execute_query('UPDATE users SET password_hash = ? WHERE id = ?', (legacy, user.id))
+    return legacy
+
+
+def login(client, user, password='password123'):
+    return client.post('/login', data={'username': user.username, 'password': password})
+
+
+def occupy_worker(passwords):
+    """Занимает поток пула заданием, которое ждет release.set()"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    def submit():
+        try:
+            passwords._submit(block)
+        except PasswordHasherBusy:
+            pass  # вызывающий перестал ждать, задание продолжает выполняться
+
+    thread = threading.Thread(target=submit)
+    thread.start()
+    started.wait()
+    return release, thread
+
+
+@pytest.fixture
+def blocked_hasher():
+    """Единственное место в пуле занято"""
+    hasher.configure(iterations=1000, workers=1, max_queue=0)
+    release, thread = occupy_worker(hasher)
+    yield hasher
+    release.set()
+    thread.join()
+
+
+def test_hash_and_verify():
+    passwords = PasswordHasher(iterations=1000)
+    stored = passwords.hash('secret')
+
+    assert stored.startswith('pbkdf2_sha256$1000$')
+    assert passwords.verify('secret', stored)
+    assert not passwords.verify('wrong', stored)
+    assert not passwords.verify('secret', 'garbage')
+
+
+def test_scrypt_hash_needs_rehash_for_pbkdf2():
+    stored = PasswordHasher(algorithm='scrypt', scrypt_n=2 ** 10).hash('secret')
+
+    assert PasswordHasher(iterations=1000).verify('secret', stored)
+    assert PasswordHasher(iterations=1000).needs_rehash(stored)
+    assert not PasswordHasher(algorithm='scrypt', scrypt_n=2 ** 10).needs_rehash(stored)
+
+
+def test_legacy_sha256_is_verified_and_rehashed(app, client, user):
+    set_legacy_hash(user, 'password123')
+
+    assert login(client, user).status_code == 302
+
+    assert stored_hash(user).startswith('pbkdf2_sha256$1000$')
+    assert User.get(user.id).check_password('password123')
+
+
+def test_legacy_sha256_wrong_password(app, client, user):
+    legacy = set_legacy_hash(user, 'password123')
+
+    assert login(client, user, 'wrong').status_code == 200
+    assert stored_hash(user) == legacy
+
+
+def test_login_succeeds_when_rehash_queue_is_full(app, client, user, monkeypatch):
+    legacy = set_legacy_hash(user, 'password123')
+
+    def busy(password):
+        raise PasswordHasherBusy()
+
+    monkeypatch.setattr(hasher, 'hash', busy)
+
+    assert login(client, user).status_code == 302
+    # Пересчет отложен до следующего входа
+    assert stored_hash(user) == legacy
+
+
+def test_login_returns_503_when_queue_is_full(app, client, user, blocked_hasher):
+    response = login(client, user)
+
+    assert response.status_code == 503
+    assert 'Сервер перегружен' in response.get_data(as_text=True)
+
+
+def test_slot_is_held_until_job_finishes(blocked_hasher):
+    with pytest.raises(PasswordHasherBusy):
+        blocked_hasher.hash('secret')
+
+
+def test_timed_out_job_is_cancelled():
+    passwords = PasswordHasher(iterations=1000, workers=1, max_queue=1, timeout=0.05)
+    release, blocker = occupy_worker(passwords)
+    ran = []
+
+    with pytest.raises(PasswordHasherBusy):
+        passwords._submit(ran.append, 1)
+    release.set()
+    blocker.join()
+
+    # Снятое с очереди задание не выполнилось и вернуло свое место
+    assert ran == []
+    assert passwords.hash('secret').startswith('pbkdf2_sha256$')
+
+
+def test_verify_dummy_always_fails():
+    passwords = PasswordHasher(iterations=1000)
+
+    assert passwords.verify_dummy('password123') is False
+    assert passwords.verify_dummy('') is False
+
+
+def test_unknown_username_runs_kdf(app, client, monkeypatch):
+    calls = []
+    verify = hasher.verify
+    monkeypatch.setattr(hasher, 'verify', lambda password, stored: calls.append(stored) or verify(password, stored))
+
+    response = client.post('/login', data={'username': 'ghost', 'password': 'password123'})
+
+    assert response.status_code == 200
+    assert len(calls) == 1 and calls[0].startswith('pbkdf2_sha256$')
@@ -0,0 +1,118 @@
+import sqlite3
+
+import pytest
+
+from app.database import db
+from app.query import QueryBuilder
+
+SCHEMA = {'tasks': ['id', 'title', 'status', 'user_id'], 'users': ['id', 'username']}
+
+
+@pytest.fixture
+def queries():
+    return QueryBuilder(SCHEMA)
+
+
+@pytest.mark.parametrize('build', [
+    lambda q: q.select('tasks; DROP TABLE users'),
+    lambda q: q.select('sqlite_master'),
+    lambda q: q.count('missing'),
+    lambda q: q.insert('missing', ('id',)),
+    lambda q: q.update('missing', ('id',), ('id',)),
+    lambda q: q.delete('missing', ('id',)),
+])
+def test_unknown_table(queries, build):
+    with pytest.raises(ValueError, match='Неизвестная таблица'):
+        build(queries)
+
+
+@pytest.mark.parametrize('build', [
+    lambda q: q.select('tasks', ('id', 'password')),
+    lambda q: q.select('tasks', ('id',), where=('username',)),
+    lambda q: q.select('tasks', ('id',), order_by=(('1; DROP TABLE tasks --', 'ASC'),)),
+    lambda q: q.select('users', ('title',)),
+    lambda q: q.insert('tasks', ('title', 'secret')),
+    lambda q: q.update('tasks', ('title', 'id = 1 OR 1'), ('id',)),
+    lambda q: q.update('tasks', ('title',), (('owner', '>'),)),
+    lambda q: q.delete('tasks', ('user_id', 'owner')),
+    lambda q: q.count('tasks', (('status', '!=', 'completed'), 'nope')),
+])
+def test_unknown_column(queries, build):
+    with pytest.raises(ValueError, match='Неизвестная колонка'):
+        build(queries)
+
+
+@pytest.mark.parametrize('op', ['LIKE', '= 1 OR 1 =', '==', ''])
+def test_bad_operator(queries, op):
+    with pytest.raises(ValueError, match='Недопустимый оператор'):
+        queries.select('tasks', ('id',), where=(('status', op),))
+
+
+@pytest.mark.parametrize('direction', ['asc', 'DESC; DROP TABLE tasks', ''])
+def test_bad_direction(queries, direction):
+    with pytest.raises(ValueError, match='Недопустимое направление сортировки'):
+        queries.select('tasks', ('id',), order_by=(('id', direction),))
+
+
+@pytest.mark.parametrize('value', [None, True, b'x', object()])
+def test_bad_literal(queries, value):
+    with pytest.raises(ValueError, match='Недопустимое значение'):
+        queries.count('tasks', (('status', '!=', value),))
+
+
+def test_rejected_shape_is_not_cached(queries):
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            queries.select('tasks', ('secret',))
+
+
+def test_same_shape_returns_same_string(queries):
+    first = queries.select('tasks', ('id', 'title'), where=('user_id', ('id', '>')),
+                           order_by=(('id', 'ASC'),), limit=True)
+    second = queries.select('tasks', ('id', 'title'), where=('user_id', ('id', '>')),
+                            order_by=(('id', 'ASC'),), limit=True)
+
+    assert first is second
+    assert first == 'SELECT id, title FROM tasks WHERE user_id = ? AND id > ? ORDER BY id ASC LIMIT ?'
+    assert queries.select('tasks', ('id',)) is not first
+
+
+def test_generated_sql(queries):
+    assert queries.insert('tasks', ('title', 'user_id')) == 'INSERT INTO tasks (title, user_id) VALUES (?, ?)'
+    assert queries.update('tasks', ('title',), ('id',)) == 'UPDATE tasks SET title = ? WHERE id = ?'
+    assert queries.delete('tasks', ('id',)) == 'DELETE FROM tasks WHERE id = ?'
+    assert queries.count('tasks') == 'SELECT COUNT(*) as count FROM tasks'
+    assert (queries.select('tasks', ('title',), expressions=(('title', "COALESCE(title, '')"),))
+            == "SELECT COALESCE(title, '') AS title FROM tasks")
+
+
+def test_literal_is_quoted(queries):
+    sql = queries.count('tasks', (('status', '!=', "it's"), ('user_id', '>', 3)))
+
+    assert sql == "SELECT COUNT(*) as count FROM tasks WHERE status != 'it''s' AND user_id > 3"
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE tasks (id, title, status, user_id)')
+    conn.execute("INSERT INTO tasks VALUES (1, 'a', 'it''s', 4)")
+    assert conn.execute(sql).fetchone() == (0,)
+
+
+def test_schema_is_loaded_from_database():
+    assert 'change_seq' in db.queries.schema['tasks']
+    with pytest.raises(ValueError):
+        db.queries.select('tasks', ('password_hash',))
+
+
+def test_update_and_delete_require_where(app):
+    with pytest.raises(ValueError, match='Обновление без условия WHERE запрещено'):
+        db.update('tasks', {'title': 'x'}, {})
+    with pytest.raises(ValueError, match='Удаление без условия WHERE запрещено'):
+        db.delete('tasks', {})
+
+
+def test_update_and_delete_by_where(make_task):
+    task = make_task('До')
+
+    assert db.update('tasks', {'title': 'После'}, {'id': task.id}) == 1
+    assert db.fetch_one('SELECT title FROM tasks WHERE id = ?', (task.id,))['title'] == 'После'
+    assert db.delete('tasks', {'id': task.id}) == 1
+    assert db.fetch_one('SELECT id FROM tasks WHERE id = ?', (task.id,)) is None
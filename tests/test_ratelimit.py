@@ -0,0 +1,151 @@
+import contextlib
+import threading
+import time
+
+import pytest
+
+from app.database import Database
+from app.ratelimit import MemoryBucketStore
+
+
+@pytest.fixture
+def limited_app(app):
+    """Лимит API: 2 запроса подряд, затем 1 запрос в 10 секунд"""
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_GROUPS']['api'].update(rate=0.1, burst=2)
+    return app
+
+
+def test_api_returns_429_with_retry_after(limited_app, user_client):
+    assert user_client.get('/api/tasks').status_code == 200
+    assert user_client.get('/api/tasks').status_code == 200
+
+    response = user_client.get('/api/tasks')
+
+    assert response.status_code == 429
+    assert response.get_json() == {'error': 'Слишком много запросов'}
+    assert 1 <= int(response.headers['Retry-After']) <= 10
+
+
+def test_pages_are_not_limited_by_api_group(limited_app, user_client):
+    for _ in range(3):
+        user_client.get('/api/tasks')
+
+    assert user_client.get('/tasks').status_code == 200
+
+
+def test_api_limit_is_per_user(limited_app, user_client):
+    from app.auth import User
+
+    for _ in range(3):
+        user_client.get('/api/tasks')
+    User.create('second', 'second@example.com', 'password123')
+    user_client.get('/logout')
+    user_client.post('/login', data={'username': 'second', 'password': 'password123'})
+
+    assert user_client.get('/api/tasks').status_code == 200
+
+
+def test_login_limit_returns_text_429(app, client):
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_GROUPS']['login'].update(rate=0.1, burst=1)
+    data = {'username': 'nobody', 'password': 'wrong'}
+
+    assert client.post('/login', data=data).status_code == 200
+    response = client.post('/login', data=data)
+
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+
+
+def test_bucket_refills():
+    store = MemoryBucketStore()
+
+    assert store.hit('k', rate=10, burst=1)[0]
+    allowed, retry_after = store.hit('k', rate=10, burst=1)
+
+    assert not allowed
+    assert 0 < retry_after <= 0.1
+
+
+def test_shedding_returns_503_when_db_is_slow(app, user_client, monkeypatch):
+    monkeypatch.setattr(Database, 'oldest_wait', property(lambda self: 5.0))
+
+    response = user_client.get('/api/tasks')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_shedding_can_be_disabled(app, user_client, monkeypatch):
+    app.config['SHED_DB_WAIT'] = 0
+    monkeypatch.setattr(Database, 'oldest_wait', property(lambda self: 5.0))
+
+    assert user_client.get('/api/tasks').status_code == 200
+
+
+def hold_db(seconds, background):
+    """Операция с базой в отдельном потоке, идущая seconds секунд"""
+    from app.database import db
+
+    started = threading.Event()
+
+    def run():
+        with db.background() if background else contextlib.nullcontext():
+            with db.get_cursor():
+                started.set()
+                time.sleep(seconds)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait()
+    time.sleep(seconds / 2)
+    return thread
+
+
+def test_long_background_operation_does_not_shed(app, user_client):
+    app.config['SHED_DB_WAIT'] = 0.1
+
+    thread = hold_db(0.4, background=True)
+    response = user_client.get('/tasks')
+    thread.join()
+
+    assert response.status_code == 200
+
+
+def test_long_request_operation_sheds(app, user_client):
+    app.config['SHED_DB_WAIT'] = 0.1
+
+    thread = hold_db(0.4, background=False)
+    response = user_client.get('/tasks')
+    thread.join()
+
+    assert response.status_code == 503
+
+
+def test_login_limit_uses_forwarded_client_address(monkeypatch):
+    from app import create_app
+
+    monkeypatch.setenv('FLASK_PROXY_FIX_X_FOR', '1')
+    app = create_app()
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_GROUPS']['login'].update(rate=0.1, burst=1)
+    client = app.test_client()
+    data = {'username': 'nobody', 'password': 'wrong'}
+
+    def login(client_ip):
+        return client.post('/login', data=data, headers={'X-Forwarded-For': client_ip},
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+    assert login('203.0.113.1').status_code == 200
+    assert login('203.0.113.1').status_code == 429
+    assert login('203.0.113.2').status_code == 200
+
+
+def test_forwarded_header_is_ignored_without_proxy_fix(app, client):
+    app.config['RATELIMIT_ENABLED'] = True
+    app.config['RATELIMIT_GROUPS']['login'].update(rate=0.1, burst=1)
+    data = {'username': 'nobody', 'password': 'wrong'}
+
+    assert client.post('/login', data=data, headers={'X-Forwarded-For': '203.0.113.1'}).status_code == 200
+    assert client.post('/login', data=data, headers={'X-Forwarded-For': '203.0.113.2'}).status_code == 429
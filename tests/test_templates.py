@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+from jinja2 import DictLoader, Environment
+
+from app.models import Task
+from app.templating import FragmentCache, FragmentCacheExtension
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    cache = FragmentCache(max_size=2)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    cache.get('a')
+    cache.set('c', 'C')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.status() == {'size': 2, 'max_size': 2, 'hits': 2, 'misses': 1}
+
+
+def test_fragment_cache_can_be_disabled():
+    cache = FragmentCache(max_size=0)
+    cache.set('a', 'A')
+
+    assert cache.get('a') is None
+
+
+def test_cache_tag_renders_body_once_per_key():
+    env = Environment(loader=DictLoader({
+        'card': '{% cache "card", id %}{{ id }}:{{ calls.append(1) or calls|length }}{% endcache %}'
+    }), extensions=[FragmentCacheExtension])
+    env.fragment_cache = FragmentCache(10)
+    template = env.get_template('card')
+    calls = []
+
+    assert template.render(id=1, calls=calls) == '1:1'
+    assert template.render(id=1, calls=calls) == '1:1'
+    assert template.render(id=2, calls=calls) == '2:2'
+
+
+def test_card_is_rerendered_after_updates_in_same_second(user_client, make_task):
+    task = make_task('Исходная')
+    assert 'Исходная' in user_client.get('/tasks').get_data(as_text=True)
+
+    # Две правки подряд укладываются в одну секунду updated_at;
+    # ключ карточки включает change_seq, который растет при каждой
+    user_client.put(f'/api/task/{task.id}', json={'title': 'Первая правка'})
+    assert 'Первая правка' in user_client.get('/tasks').get_data(as_text=True)
+    user_client.put(f'/api/task/{task.id}', json={'title': 'Вторая правка'})
+
+    page = user_client.get('/tasks').get_data(as_text=True)
+    assert 'Вторая правка' in page
+    assert 'Первая правка' not in page
+
+
+def test_card_is_rerendered_after_status_change(user_client, make_task):
+    task = make_task('Просроченная', due_date=date.today() - timedelta(days=1))
+    page = user_client.get('/tasks').get_data(as_text=True)
+    assert 'Просрочено: 1' in page
+    assert 'title="Срок истек"' in page
+
+    Task.get(task.id).update(status='completed')
+
+    page = user_client.get('/tasks').get_data(as_text=True)
+    assert 'Просрочено:' not in page
+    assert 'title="Срок истек"' not in page
+    assert 'task-status-completed' in page
+
+
+def test_repeated_page_uses_cached_cards(app, user_client, make_task):
+    for i in range(3):
+        make_task(f'Задача {i}')
+    cache = app.jinja_env.fragment_cache
+
+    user_client.get('/tasks')
+    hits = cache.hits
+    user_client.get('/tasks')
+
+    assert cache.hits - hits == 3
+
+
+def test_render_time_header(user_client):
+    response = user_client.get('/tasks')
+
+    assert response.headers['Server-Timing'].startswith('render;dur=')
+
+
+def test_template_stats_are_admin_only(user_client):
+    assert user_client.get('/api/admin/templates').status_code == 403
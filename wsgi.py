@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+"""Точка входа WSGI для производственного сервера.
+
+Запуск:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app
+
+app = create_app()